@@ -409,6 +409,8 @@ CREATE INDEX idx_users_is_active ON users(is_active);
 CREATE INDEX idx_doctors_user_id ON doctors(user_id);
 CREATE INDEX idx_doctors_hospital_id ON doctors(hospital_id);
 CREATE INDEX idx_doctors_name ON doctors(name);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_doctors_name_trgm ON doctors USING gin (name gin_trgm_ops);
 CREATE INDEX idx_doctors_mobile ON doctors(mobile) WHERE mobile IS NOT NULL;
 CREATE INDEX idx_doctors_is_active ON doctors(is_active);
 CREATE INDEX idx_doctors_specialization ON doctors(specialization) WHERE specialization IS NOT NULL;
@@ -423,6 +425,7 @@ CREATE INDEX idx_appointments_followup_date ON appointments(followup_date);
 CREATE INDEX idx_appointments_visit_date ON appointments(visit_date);
 CREATE INDEX idx_appointments_status_date ON appointments(status, date);
 CREATE INDEX idx_appointments_doctor_date ON appointments(doctor_id, date);
+CREATE UNIQUE INDEX idx_appointments_unique_active_slot ON appointments(doctor_id, date, time_slot) WHERE status <> 'cancelled';
 
 -- Operations indexes
 CREATE INDEX idx_operations_hospital_id ON operations(hospital_id);
@@ -434,14 +437,15 @@ CREATE INDEX idx_operations_specialty ON operations(specialty);
 
 -- Payments indexes
 CREATE INDEX idx_payments_user_id ON payments(user_id);
+CREATE INDEX idx_payments_user_id_id ON payments(user_id, id DESC);
 CREATE INDEX idx_payments_appointment_id ON payments(appointment_id);
 CREATE INDEX idx_payments_operation_id ON payments(operation_id);
 CREATE INDEX idx_payments_hospital_id ON payments(hospital_id);
 CREATE INDEX idx_payments_status ON payments(status);
 CREATE INDEX idx_payments_transaction_id ON payments(transaction_id);
-CREATE INDEX idx_payments_razorpay_order_id ON payments(razorpay_order_id) WHERE razorpay_order_id IS NOT NULL;
+CREATE UNIQUE INDEX idx_payments_razorpay_order_id ON payments(razorpay_order_id) WHERE razorpay_order_id IS NOT NULL;
 CREATE INDEX idx_payments_razorpay_payment_id ON payments(razorpay_payment_id) WHERE razorpay_payment_id IS NOT NULL;
-CREATE INDEX idx_payments_cashfree_order_id ON payments(cashfree_order_id) WHERE cashfree_order_id IS NOT NULL;
+CREATE UNIQUE INDEX idx_payments_cashfree_order_id ON payments(cashfree_order_id) WHERE cashfree_order_id IS NOT NULL;
 CREATE INDEX idx_payments_internal_transaction_id ON payments(internal_transaction_id) WHERE internal_transaction_id IS NOT NULL;
 CREATE INDEX idx_payments_currency ON payments(currency);
 CREATE INDEX idx_payments_initiated_at ON payments(initiated_at);
@@ -473,9 +477,9 @@ CREATE INDEX idx_payment_manual_review_status ON payment_manual_review(status);
 CREATE INDEX idx_payment_manual_review_priority ON payment_manual_review(priority);
 
 -- Audit logs indexes
-CREATE INDEX idx_audit_logs_user_id ON audit_logs(user_id);
-CREATE INDEX idx_audit_logs_event_type ON audit_logs(event_type);
-CREATE INDEX idx_audit_logs_resource ON audit_logs(resource_type, resource_id);
+CREATE INDEX idx_audit_logs_user_created ON audit_logs(user_id, created_at DESC);
+CREATE INDEX idx_audit_logs_event_created ON audit_logs(event_type, created_at DESC);
+CREATE INDEX idx_audit_logs_resource_created ON audit_logs(resource_type, resource_id, created_at DESC);
 CREATE INDEX idx_audit_logs_created_at ON audit_logs(created_at DESC);
 CREATE INDEX idx_audit_logs_status ON audit_logs(status);
 
@@ -23,6 +23,19 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT: float = 30.0
+    
+    # Audit log batching: events are inserted in batches of up to AUDIT_BATCH_SIZE rows,
+    # at least every AUDIT_BATCH_MS milliseconds while events are pending
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_BATCH_MS: int = 500
+    AUDIT_QUEUE_MAX: int = 10_000
+    # A failed batch is retried this many times (backing off AUDIT_RETRY_BACKOFF_MS per attempt)
+    # before its events are inserted one at a time
+    AUDIT_BATCH_RETRIES: int = 2
+    AUDIT_RETRY_BACKOFF_MS: int = 200
     
     # JWT Auth
     JWT_SECRET: str = "anagha-hospital-solutions-secret-key-2024"
@@ -1,14 +1,55 @@
-from supabase import create_client, Client
-from typing import Optional
+from supabase import create_client, Client, ClientOptions
+from postgrest.exceptions import APIError
+from fastapi import HTTPException
+from typing import Any, Dict, Optional
 from core.config import settings
+import httpx
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# PostgREST error code for a function that is not deployed in the database
+RPC_NOT_FOUND_CODE = "PGRST202"
+# SQLSTATE used by RAISE EXCEPTION in our SQL functions for user-facing errors
+RPC_RAISE_CODE = "P0001"
+# SQLSTATE for unique constraint / unique index violations
+UNIQUE_VIOLATION_CODE = "23505"
+
+# Functions found missing once are not retried, so fallbacks cost no extra round-trip
+_missing_rpcs: set = set()
+
 supabase: Optional[Client] = None
 
+# Shared keep-alive HTTP pool for all PostgREST calls made through the Supabase client
+_http_client: Optional[httpx.Client] = None
+
+_init_lock = threading.Lock()
+
+def _create_http_client() -> httpx.Client:
+    # retries=1 re-dials once when a pooled keep-alive connection was dropped by the server
+    transport = httpx.HTTPTransport(
+        retries=1,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return httpx.Client(
+        transport=transport,
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT),
+        follow_redirects=True,
+    )
+
 def init_db():
-    global supabase
+    with _init_lock:
+        # Another thread may have finished initialising while this one waited
+        if supabase is None:
+            _init_db()
+
+def _init_db():
+    global supabase, _http_client
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         logger.error(
             "❌ SUPABASE_URL or SUPABASE_KEY is empty! "
@@ -17,11 +58,25 @@ def init_db():
         )
         return
     try:
-        supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        if _http_client is None:
+            _http_client = _create_http_client()
+        supabase = create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=ClientOptions(httpx_client=_http_client),
+        )
         logger.info("✅ Supabase client initialized successfully")
     except Exception as e:
         logger.error(f"❌ Could not initialize Supabase client: {e}")
 
+def close_db():
+    global supabase, _http_client
+    with _init_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        supabase = None
+
 def get_supabase() -> Optional[Client]:
     if not supabase:
         init_db()
@@ -30,3 +85,24 @@ def get_supabase() -> Optional[Client]:
 def get_db():
     yield get_supabase()
 
+def call_rpc(supabase: Client, name: str, params: Dict[str, Any]) -> Optional[Any]:
+    """
+    Call a Postgres function through PostgREST.
+    Returns None when the function is not deployed so callers can fall back to table queries.
+    Errors raised by the function (SQLSTATE P0001) become HTTPExceptions, with the HINT
+    as status code and the message as detail.
+    """
+    if name in _missing_rpcs:
+        return None
+    try:
+        return supabase.rpc(name, params).execute().data
+    except APIError as e:
+        if e.code == RPC_NOT_FOUND_CODE:
+            logger.warning(f"⚠️ Database function '{name}' not found, using table queries instead")
+            _missing_rpcs.add(name)
+            return None
+        if e.code == RPC_RAISE_CODE:
+            status_code = int(e.hint) if e.hint and e.hint.isdigit() else 400
+            raise HTTPException(status_code=status_code, detail=e.message)
+        raise
+
@@ -1,31 +1,83 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError
 from core.config import settings
 
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+# HS256 signing material, prepared once instead of on every token
+_JWT_SECRET_BYTES = settings.JWT_SECRET.encode("utf-8")
+# Keyed HMAC state (inner/outer pads already absorbed); copied per token
+_HS256_MAC = hmac.new(_JWT_SECRET_BYTES, digestmod=hashlib.sha256)
+_HS256_HEADER_B64 = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+_REFRESH_TOKEN_SECONDS = 7 * 24 * 3600
+
+def _encode_jwt(claims: dict) -> str:
+    """Encode a JWT, signing HS256 tokens directly with hmac instead of going through jose"""
+    if settings.JWT_ALGORITHM != "HS256":
+        return jwt.encode(claims, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    for claim in _TIME_CLAIMS:
+        value = claims.get(claim)
+        if isinstance(value, datetime):
+            claims[claim] = calendar.timegm(value.utctimetuple())
+    payload_b64 = _b64url(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = f"{_HS256_HEADER_B64}.{payload_b64}"
+    mac = _HS256_MAC.copy()
+    mac.update(signing_input.encode("ascii"))
+    signature = mac.digest()
+    return f"{signing_input}.{_b64url(signature)}"
+
+# Argon2id hasher (RFC 9106 / OWASP parameters), shared by all hash and verify calls
+_password_hasher = PasswordHasher(time_cost=3, memory_cost=64 * 1024, parallelism=2, hash_len=32, salt_len=16)
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith("$2")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        # Accounts created before the Argon2 switch still carry bcrypt hashes
+        if _is_bcrypt_hash(hashed_password):
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return _password_hasher.verify(hashed_password, plain_password)
     except Exception:
         return False
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if a verified hash is bcrypt or uses outdated Argon2 parameters"""
+    if _is_bcrypt_hash(hashed_password):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
+
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return _password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expires_in = int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        expires_in = settings.JWT_EXPIRATION_HOURS * 3600
+    to_encode.update({"exp": int(time.time()) + expires_in})
+    encoded_jwt = _encode_jwt(to_encode)
     return encoded_jwt
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=7) # 7 days refresh
+    expire = int(time.time()) + _REFRESH_TOKEN_SECONDS # 7 days refresh
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    encoded_jwt = _encode_jwt(to_encode)
     return encoded_jwt
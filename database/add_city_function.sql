@@ -0,0 +1,31 @@
+-- add_city_function.sql
+-- Adds a city, or finds the existing one, in a single round-trip.
+-- Relies on idx_cities_unique_city_name (cities_unique_name.sql); run that first.
+-- ON CONFLICT DO NOTHING plus a lookup avoids the dead row a no-op DO UPDATE would leave.
+-- The API falls back to insert-then-select through PostgREST when this function is not deployed.
+
+CREATE OR REPLACE FUNCTION public.add_city(
+    p_city_name TEXT,
+    p_state_name TEXT DEFAULT NULL,
+    p_district_name TEXT DEFAULT NULL,
+    p_pincode TEXT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_id public.cities.id%TYPE;
+BEGIN
+    INSERT INTO public.cities (city_name, state_name, district_name, pincode, source, is_active)
+    VALUES (p_city_name, p_state_name, p_district_name, p_pincode, 'manual', TRUE)
+    ON CONFLICT (city_name) DO NOTHING
+    RETURNING id INTO v_id;
+
+    IF v_id IS NOT NULL THEN
+        RETURN json_build_object('id', v_id, 'inserted', TRUE);
+    END IF;
+
+    SELECT id INTO v_id FROM public.cities WHERE city_name = p_city_name;
+    RETURN json_build_object('id', v_id, 'inserted', FALSE);
+END;
+$$;
@@ -0,0 +1,12 @@
+-- appointment_slot_unique_index.sql
+-- One active booking per doctor, date and time slot, enforced atomically by the database.
+-- Cancelled appointments are excluded so a cancelled slot can be booked again.
+-- The API relies on this index (unique violation 23505) instead of a pre-insert slot check.
+--
+-- Note: creation fails if duplicate active bookings already exist; cancel the duplicates first:
+--   SELECT doctor_id, date, time_slot, COUNT(*) FROM appointments
+--   WHERE status <> 'cancelled' GROUP BY 1, 2, 3 HAVING COUNT(*) > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_unique_active_slot
+    ON public.appointments (doctor_id, date, time_slot)
+    WHERE status <> 'cancelled';
@@ -0,0 +1,22 @@
+-- audit_logs_indexes.sql
+-- Composite indexes matching get_audit_logs: each filter column followed by created_at DESC,
+-- so a filtered "newest first ... LIMIT n" query is an index range scan instead of a sort.
+-- They supersede the single-column indexes, which are dropped to keep batched inserts cheap.
+--
+-- CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block; run these statements
+-- one at a time (the Supabase SQL editor wraps a multi-statement run in a transaction).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_user_created
+    ON public.audit_logs (user_id, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_event_created
+    ON public.audit_logs (event_type, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_resource_created
+    ON public.audit_logs (resource_type, resource_id, created_at DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_audit_logs_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_audit_logs_event_type;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_audit_logs_resource;
+
+-- Optional 90-day retention, matching the default window of get_audit_logs (requires pg_cron):
+--   SELECT cron.schedule('audit-logs-retention', '30 3 * * *',
+--       $$DELETE FROM public.audit_logs WHERE created_at < now() - interval '90 days'$$);
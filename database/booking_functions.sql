@@ -0,0 +1,124 @@
+-- booking_functions.sql
+-- Server-side booking: validate, check the slot and insert in a single round-trip.
+--
+-- Validation failures are raised with RAISE EXCEPTION (SQLSTATE P0001); the HINT carries
+-- the HTTP status code and the message is returned to the client as the error detail.
+-- The API falls back to individual table queries when these functions are not deployed.
+-- Run appointment_slot_unique_index.sql first: book_appointment relies on that index for slot conflicts.
+
+-- 1. Appointment booking (authenticated and guest)
+CREATE OR REPLACE FUNCTION public.book_appointment(
+    p_doctor_id INT,
+    p_date DATE,
+    p_time_slot TEXT,
+    p_reason TEXT DEFAULT '',
+    p_user_id INT DEFAULT NULL,
+    p_user_hospital_id INT DEFAULT NULL,
+    p_is_guest BOOLEAN DEFAULT FALSE,
+    p_patient_name TEXT DEFAULT NULL,
+    p_patient_phone TEXT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_doctor public.doctors%ROWTYPE;
+    v_hospital public.hospitals%ROWTYPE;
+    v_appointment public.appointments%ROWTYPE;
+    v_user_id INT := p_user_id;
+BEGIN
+    -- Lock the doctor row so concurrent bookings for the same doctor are serialized
+    SELECT * INTO v_doctor FROM public.doctors WHERE id = p_doctor_id AND is_active = TRUE FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Doctor not found' USING HINT = '404';
+    END IF;
+    IF v_doctor.hospital_id IS NULL THEN
+        RAISE EXCEPTION 'Doctor is not associated with any hospital' USING HINT = '400';
+    END IF;
+    IF NOT p_is_guest AND p_user_hospital_id IS NOT NULL AND p_user_hospital_id <> v_doctor.hospital_id THEN
+        RAISE EXCEPTION 'Doctor does not belong to your selected hospital' USING HINT = '400';
+    END IF;
+
+    SELECT * INTO v_hospital FROM public.hospitals WHERE id = v_doctor.hospital_id;
+    IF NOT FOUND OR v_hospital.status NOT IN ('approved', 'ACTIVE') THEN
+        RAISE EXCEPTION 'Hospital not found or not approved' USING HINT = '400';
+    END IF;
+
+    IF p_is_guest THEN
+        -- New guests cost a single statement; on conflict the existing row is left untouched.
+        -- Guest accounts never log in, so they get an unusable password hash
+        INSERT INTO public.users (name, mobile, role, is_active, password_hash)
+        VALUES (p_patient_name, p_patient_phone, 'patient', FALSE, '!' || md5(random()::text || clock_timestamp()::text))
+        ON CONFLICT (mobile) DO NOTHING
+        RETURNING id INTO v_user_id;
+        IF v_user_id IS NULL THEN
+            SELECT id INTO v_user_id FROM public.users WHERE mobile = p_patient_phone AND role = 'patient';
+            IF v_user_id IS NULL THEN
+                RAISE EXCEPTION 'Mobile number is registered to a non-patient account' USING HINT = '400';
+            END IF;
+        END IF;
+    END IF;
+
+    -- idx_appointments_unique_active_slot detects a taken slot in the same index probe as the insert;
+    -- raising here aborts the whole call, so a guest account created above is rolled back too
+    BEGIN
+        INSERT INTO public.appointments (user_id, doctor_id, hospital_id, date, time_slot, status, reason)
+        VALUES (v_user_id, p_doctor_id, v_doctor.hospital_id, p_date, p_time_slot, 'pending', p_reason)
+        RETURNING * INTO v_appointment;
+    EXCEPTION WHEN unique_violation THEN
+        RAISE EXCEPTION 'Time slot already booked' USING HINT = '400';
+    END;
+
+    RETURN json_build_object(
+        'appointment', row_to_json(v_appointment),
+        'hospital', row_to_json(v_hospital),
+        'doctor', row_to_json(v_doctor),
+        'user_id', v_user_id
+    );
+END;
+$$;
+
+-- 2. Operation booking
+CREATE OR REPLACE FUNCTION public.book_operation(
+    p_patient_id INT,
+    p_doctor_id INT,
+    p_date DATE,
+    p_specialty TEXT,
+    p_notes TEXT DEFAULT NULL,
+    p_user_hospital_id INT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_doctor public.doctors%ROWTYPE;
+    v_hospital public.hospitals%ROWTYPE;
+    v_operation public.operations%ROWTYPE;
+BEGIN
+    SELECT * INTO v_doctor FROM public.doctors WHERE id = p_doctor_id AND is_active = TRUE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Doctor not found' USING HINT = '404';
+    END IF;
+    IF v_doctor.hospital_id IS NULL THEN
+        RAISE EXCEPTION 'Doctor is not associated with any hospital' USING HINT = '400';
+    END IF;
+    IF p_user_hospital_id IS NOT NULL AND p_user_hospital_id <> v_doctor.hospital_id THEN
+        RAISE EXCEPTION 'Doctor does not belong to your selected hospital' USING HINT = '400';
+    END IF;
+
+    SELECT * INTO v_hospital FROM public.hospitals WHERE id = v_doctor.hospital_id;
+    IF NOT FOUND OR v_hospital.status <> 'approved' THEN
+        RAISE EXCEPTION 'Cannot book operation with unapproved hospital' USING HINT = '400';
+    END IF;
+
+    INSERT INTO public.operations (patient_id, specialty, operation_date, doctor_id, hospital_id, status, notes)
+    VALUES (p_patient_id, p_specialty, p_date, p_doctor_id, v_doctor.hospital_id, 'pending', p_notes)
+    RETURNING * INTO v_operation;
+
+    RETURN json_build_object(
+        'operation', row_to_json(v_operation),
+        'hospital', row_to_json(v_hospital),
+        'doctor', row_to_json(v_doctor)
+    );
+END;
+$$;
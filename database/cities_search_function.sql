@@ -0,0 +1,27 @@
+-- cities_search_function.sql
+-- Ranked city search for tables too large for the API's in-memory city index.
+-- Rows come back already ordered (prefix matches first, then earlier matches, then shorter
+-- names), so the LIMIT keeps the best matches instead of an arbitrary 20.
+-- The API falls back to an unranked ILIKE query when this function is not deployed.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_cities_city_name_trgm
+    ON public.cities USING gin (city_name gin_trgm_ops)
+    WHERE is_active;
+
+CREATE OR REPLACE FUNCTION public.search_cities(p_query TEXT, p_limit INT DEFAULT 20)
+RETURNS TABLE (city_name TEXT, state_name TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.city_name::TEXT, c.state_name::TEXT
+    FROM public.cities c
+    -- Escape LIKE wildcards so the query is matched literally
+    WHERE c.is_active
+      AND c.city_name ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+    ORDER BY strpos(lower(c.city_name), lower(p_query)) <> 1,
+             strpos(lower(c.city_name), lower(p_query)),
+             length(c.city_name)
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,10 @@
+-- cities_unique_name.sql
+-- One row per city name, enforced atomically by the database.
+-- The API relies on this index (unique violation 23505) instead of a pre-insert existence check
+-- when cities are added manually.
+--
+-- Note: creation fails if duplicate city names already exist; merge or deactivate them first:
+--   SELECT city_name, COUNT(*) FROM cities GROUP BY 1 HAVING COUNT(*) > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cities_unique_city_name
+    ON public.cities (city_name);
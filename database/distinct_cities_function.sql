@@ -0,0 +1,15 @@
+-- distinct_cities_function.sql
+-- Unique (city, state) pairs of hospitals for /api/users/cities/search.
+-- Deduplicating in the database returns one row per city instead of one per hospital.
+-- The API falls back to selecting every hospital's city when this function is not deployed.
+
+CREATE OR REPLACE FUNCTION public.distinct_cities()
+RETURNS TABLE (name TEXT, state TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT DISTINCT h.city::TEXT, h.state::TEXT
+    FROM public.hospitals h
+    WHERE h.city IS NOT NULL
+    ORDER BY 1, 2;
+$$;
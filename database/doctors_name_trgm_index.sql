@@ -0,0 +1,9 @@
+-- doctors_name_trgm_index.sql
+-- Trigram index for doctor name search.
+-- /api/users/doctors/search filters with ILIKE '%q%', which a btree index on name cannot serve;
+-- a GIN trigram index lets Postgres answer substring matches without a sequential scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_doctors_name_trgm
+    ON public.doctors USING gin (name gin_trgm_ops);
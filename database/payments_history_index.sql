@@ -0,0 +1,7 @@
+-- payments_history_index.sql
+-- Serves the keyset-paginated payment history (/api/payments/my-payments):
+--   WHERE user_id = ? [AND id < ?] ORDER BY id DESC LIMIT ?
+-- The composite index lets each page start at the cursor instead of scanning the user's payments.
+
+CREATE INDEX IF NOT EXISTS idx_payments_user_id_id
+    ON public.payments (user_id, id DESC);
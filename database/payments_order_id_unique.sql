@@ -0,0 +1,18 @@
+-- payments_order_id_unique.sql
+-- Each gateway order maps to exactly one payment row. Webhooks look payments up by gateway
+-- order id, so make those indexes unique: the lookup stops at one index entry and a second
+-- row for the same order cannot be created.
+--
+-- Note: creation fails if an order id is already shared by several payments; find them with:
+--   SELECT razorpay_order_id, COUNT(*) FROM payments
+--   WHERE razorpay_order_id IS NOT NULL GROUP BY 1 HAVING COUNT(*) > 1;
+
+DROP INDEX IF EXISTS idx_payments_razorpay_order_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_razorpay_order_id
+    ON public.payments (razorpay_order_id)
+    WHERE razorpay_order_id IS NOT NULL;
+
+DROP INDEX IF EXISTS idx_payments_cashfree_order_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_cashfree_order_id
+    ON public.payments (cashfree_order_id)
+    WHERE cashfree_order_id IS NOT NULL;
@@ -0,0 +1,62 @@
+-- register_doctor_function.sql
+-- Doctor self-registration in a single transaction: hospital check, login user and doctor profile.
+-- Any failure rolls back the whole call, so no orphaned user is left behind.
+-- Errors use the booking_functions.sql convention: RAISE EXCEPTION with the HTTP status code in HINT.
+-- The API falls back to individual table queries when this function is not deployed.
+
+CREATE OR REPLACE FUNCTION public.register_doctor(
+    p_user JSONB,
+    p_doctor JSONB
+)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_hospital_id INT := (p_doctor->>'hospital_id')::INT;
+    v_user_id INT;
+    v_doctor public.doctors%ROWTYPE;
+BEGIN
+    -- FOR SHARE keeps the hospital from being deactivated until the doctor row is committed
+    PERFORM 1 FROM public.hospitals WHERE id = v_hospital_id AND status = 'ACTIVE' FOR SHARE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Associated hospital is not active' USING HINT = '400';
+    END IF;
+
+    BEGIN
+        INSERT INTO public.users (name, mobile, role, password_hash, is_active, token_version)
+        VALUES (
+            p_user->>'name',
+            p_user->>'mobile',
+            p_user->>'role',
+            p_user->>'password_hash',
+            COALESCE((p_user->>'is_active')::BOOLEAN, TRUE),
+            COALESCE((p_user->>'token_version')::INT, 1)
+        )
+        RETURNING id INTO v_user_id;
+    EXCEPTION WHEN unique_violation THEN
+        RAISE EXCEPTION 'Mobile already registered' USING HINT = '400';
+    END;
+
+    -- Doctors start inactive until an admin approves them
+    INSERT INTO public.doctors (
+        user_id, hospital_id, name, mobile, email, degree, institute_name, experience1,
+        source, is_active, status
+    )
+    VALUES (
+        v_user_id,
+        v_hospital_id,
+        p_doctor->>'name',
+        p_doctor->>'mobile',
+        p_doctor->>'email',
+        p_doctor->>'degree',
+        p_doctor->>'institute_name',
+        p_doctor->>'experience1',
+        COALESCE(p_doctor->>'source', 'registered'),
+        FALSE,
+        'PENDING_APPROVAL'
+    )
+    RETURNING * INTO v_doctor;
+
+    RETURN row_to_json(v_doctor);
+END;
+$$;
@@ -36,7 +36,7 @@ async def get_current_user(request: Request):
         raise HTTPException(status_code=500, detail="Database error")
     
     # 1. Check if token is blacklisted
-    is_blacklisted = supabase.table("token_blacklist").select("id").eq("token", token).execute()
+    is_blacklisted = supabase.table("token_blacklist").select("id").eq("token", token).limit(1).execute()
     if is_blacklisted.data:
         raise HTTPException(status_code=401, detail="Token has been revoked")
 
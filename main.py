@@ -1,29 +1,48 @@
 import logging
+import logging.handlers
+import queue
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from core.config import settings
-from core.database import init_db
+from core.database import init_db, close_db
 from core.limiter import init_redis
 from fastapi_limiter import FastAPILimiter
 
-# Configure logging
+# Configure logging. Handlers only enqueue records; a listener thread formats and writes
+# them, so logging never blocks the event loop on stderr.
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler, respect_handler_level=True)
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+# Only merge args (and tracebacks) into the message here; the listener applies the full format
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
     level=logging.INFO if settings.ENVIRONMENT == "production" else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[_log_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
 # Import routers once they are refactored
 from routers import users, hospitals, appointments, operations, payments, admin, cities, whatsapp_logs
+from services.hospital_service import HospitalService
+from services.audit_logger import start_audit_writer, stop_audit_writer
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Started per lifespan, not at import, so it runs again after a previous shutdown stopped it;
+    # records logged before this point wait in the queue
+    _log_listener.start()
     logger.info("🚀 Starting Unified Hospital API Server...")
     init_db()
+    HospitalService.warm_cache()
+    start_audit_writer()
     # Initialize Redis for rate limiting
     redis_conn = await init_redis()
     if redis_conn:
@@ -34,12 +53,18 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     logger.info("🛑 Shutting down Server...")
+    # Flush queued audit events while the database client is still open
+    await run_in_threadpool(stop_audit_writer)
+    close_db()
+    # Flushes queued records before the process exits
+    _log_listener.stop()
 
 app = FastAPI(
     title="Hospital Booking System API",
     description="Unified API for Web and Mobile Hospital Booking",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS Middleware
@@ -56,6 +81,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Appointment lists and pricing are large JSON bodies; small responses are left uncompressed
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Include routers
 app.include_router(users.router)
@@ -71,7 +98,8 @@ app.include_router(whatsapp_logs.router)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = exc.errors()
     error_details = [{"field": ".".join(str(loc) for loc in e["loc"]), "message": e["msg"]} for e in errors]
-    return JSONResponse(
+    logger.warning("Validation error on %s: %s", request.url.path, error_details)
+    return ORJSONResponse(
         status_code=422,
         content={"detail": error_details, "message": "Validation error"}
     )
@@ -79,8 +107,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global Error handling {request.url.path}: {exc}", exc_info=True)
-    return JSONResponse(
+    logger.exception("Unhandled error on %s", request.url.path)
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error.", "message": str(exc) if settings.ENVIRONMENT != "production" else "An unexpected error occurred."}
     )
@@ -23,6 +23,16 @@ class OperationStatus(str, enum.Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
+# Bookable appointment slots, in display order
+# Morning slots: 9:30 AM to 3:30 PM
+# Evening slots: 6:00 PM to 8:30 PM
+TIME_SLOTS = (
+    "09:30", "10:00", "10:30", "11:00", "11:30", "12:00",
+    "12:30", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30",
+    "18:00", "18:30", "19:00", "19:30", "20:00", "20:30"
+)
+VALID_TIME_SLOTS = frozenset(TIME_SLOTS)
+
 class Specialty(str, enum.Enum):
     ORTHO = "ortho"
     GYN = "gyn"
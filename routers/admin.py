@@ -1,37 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request, Response
 from dependencies.auth import get_current_admin
 from services.admin_service import AdminService
+from email.utils import formatdate, parsedate_to_datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List
 import json
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+# Pricing plans carry arbitrary display fields; only the listed ones are required
+class PricingPlan(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: Any
+    price: Any
+    period: Any
+    description: Any
+    features: Any
+
+class PricingUpdate(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    plans: List[PricingPlan] = Field(min_length=1)
+    annual_discount: Any
+    currency: Any
+    currency_symbol: Any
+
 @router.post("/update-pricing")
-def update_pricing(pricing_data: dict, admin_user: dict = Depends(get_current_admin)):
-    try:
-        required_fields = ["plans", "annual_discount", "currency", "currency_symbol"]
-        for field in required_fields:
-            if field not in pricing_data:
-                raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
-        
-        if not isinstance(pricing_data["plans"], list) or len(pricing_data["plans"]) == 0:
-            raise HTTPException(status_code=400, detail="At least one plan is required")
-        
-        for plan in pricing_data["plans"]:
-            required_plan_fields = ["name", "price", "period", "description", "features"]
-            for field in required_plan_fields:
-                if field not in plan:
-                    raise HTTPException(status_code=400, detail=f"Plan missing required field: {field}")
-        
-        return AdminService.update_pricing(pricing_data)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error updating pricing: {str(e)}")
+def update_pricing(pricing_data: PricingUpdate, admin_user: dict = Depends(get_current_admin)):
+    return AdminService.update_pricing(pricing_data.model_dump())
 
 @router.get("/pricing")
 def get_pricing(admin_user: dict = Depends(get_current_admin)):
     return AdminService.get_pricing()
 
 @router.get("/pricing/public")
-def get_public_pricing():
-    return AdminService.get_public_pricing()
+def get_public_pricing(request: Request):
+    body, etag = AdminService.get_public_pricing_payload()
+    last_modified = AdminService.get_pricing_last_modified()
+
+    # Support conditional GETs so repeat visitors get a bodiless 304
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                if int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp():
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,34 +1,37 @@
-from fastapi import APIRouter, HTTPException, Query
-from services.city_service import CityService
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from services.city_service import CityService, DEFAULT_POPULAR_CITIES
+from pydantic import BaseModel
+from typing import Optional
+from cachetools import TTLCache
+import hashlib
 import logging
-from datetime import datetime
+import orjson
+import threading
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/cities", tags=["cities"])
 
-# In-memory cache for city searches
-city_search_cache = {}
+# In-memory cache for city searches (bounded, expiry on a monotonic clock)
 CACHE_TTL = 3600  # Cache for 1 hour
-cache_timestamps = {}
+city_search_cache: TTLCache = TTLCache(maxsize=1024, ttl=CACHE_TTL)
+_city_cache_lock = threading.Lock()
 
-def get_cached_cities(query: str) -> Optional[List[dict]]:
-    cache_key = query.lower()
-    if cache_key in city_search_cache:
-        if cache_key in cache_timestamps:
-            age = (datetime.now() - cache_timestamps[cache_key]).total_seconds()
-            if age < CACHE_TTL:
-                return city_search_cache[cache_key]
-            else:
-                del city_search_cache[cache_key]
-                del cache_timestamps[cache_key]
-    return None
+_POPULAR_BODY = orjson.dumps({"cities": list(DEFAULT_POPULAR_CITIES[:15]), "source": "static", "cached": True})
+_POPULAR_ETAG = '"%s"' % hashlib.blake2b(_POPULAR_BODY, digest_size=8).hexdigest()
 
-def set_cached_cities(query: str, cities: List[dict]):
-    cache_key = query.lower()
-    city_search_cache[cache_key] = cities
-    cache_timestamps[cache_key] = datetime.now()
+# Cache keys are lowercased by the callers; values are ready-to-send JSON bodies
+def get_cached_cities(cache_key: str) -> Optional[bytes]:
+    with _city_cache_lock:
+        return city_search_cache.get(cache_key)
+
+def set_cached_cities(cache_key: str, body: bytes):
+    with _city_cache_lock:
+        city_search_cache[cache_key] = body
+
+def invalidate_cached_cities(cache_key: str):
+    with _city_cache_lock:
+        city_search_cache.pop(cache_key, None)
 
 @router.get("/search")
 async def search_cities(q: str = Query("", description="Search query for city name")):
@@ -37,52 +40,43 @@ async def search_cities(q: str = Query("", description="Search query for city na
         if len(query) < 2:
             return {"cities": [], "source": "empty_query"}
         
-        cached_results = get_cached_cities(query)
-        if cached_results is not None:
-            return {"cities": cached_results, "source": "cache", "cached": True}
+        cached_body = get_cached_cities(query)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json")
         
         matching_cities = CityService.query_city_database(query)
         if matching_cities:
-            set_cached_cities(query, matching_cities)
+            # Cache the serialized cache-hit response so hits skip encoding entirely
+            set_cached_cities(query, orjson.dumps({"cities": matching_cities, "source": "cache", "cached": True}))
             
         return {"cities": matching_cities, "source": "database", "cached": False}
     except Exception as e:
-        logger.error(f"Error searching cities: {e}")
+        logger.exception("Error searching cities")
         return {"cities": [], "source": "error", "error": str(e)}
 
 @router.get("/popular")
-async def get_popular_cities():
-    try:
-        cache_key = "popular"
-        cached = get_cached_cities(cache_key)
-        if cached:
-            return {"cities": cached, "source": "cache", "cached": True}
-        
-        popular = CityService.get_popular_cities_from_db()
-        set_cached_cities(cache_key, [{"city_name": city} for city in popular])
-        return {"cities": popular, "source": "database", "cached": False}
-    except Exception as e:
-        logger.error(f"Error getting popular cities: {e}")
-        return {"cities": [], "source": "fallback"}
+async def get_popular_cities(request: Request):
+    # The list is fixed at import, so the body and its ETag are precomputed
+    headers = {"ETag": _POPULAR_ETAG, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == _POPULAR_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(content=_POPULAR_BODY, media_type="application/json", headers=headers)
+
+class CityCreate(BaseModel):
+    city_name: str
+    state_name: str = ""
+    district_name: str = ""
+    pincode: str = ""
 
 @router.post("/add")
-async def add_new_city(city_data: dict):
-    try:
-        city_name = city_data.get("city_name", "").strip()
-        if not city_name:
-            raise HTTPException(status_code=400, detail="City name is required")
-            
-        result = CityService.add_new_city(city_data)
+async def add_new_city(city_data: CityCreate):
+    city_name = city_data.city_name.strip()
+    if not city_name:
+        raise HTTPException(status_code=400, detail="City name is required")
         
-        if result["message"] == "City added successfully":
-            cache_key = city_name.lower()
-            if cache_key in city_search_cache:
-                del city_search_cache[cache_key]
-                if cache_key in cache_timestamps:
-                    del cache_timestamps[cache_key]
-                    
-        return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = CityService.add_new_city(city_data.model_dump())
+    
+    if result["message"] == "City added successfully":
+        invalidate_cached_cities(city_name.lower())
+                
+    return result
@@ -11,6 +11,9 @@ from services.message_templates import get_confirmation_message
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/operations", tags=["operations"])
 
+# Operation columns echoed back in booking responses
+_BOOKING_RESPONSE_FIELDS = ("id", "patient_id", "specialty", "doctor_id", "hospital_id", "status", "created_at", "notes")
+
 @router.post("/book", response_model=dict)
 def book_operation(operation: OperationCreate, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
     result = OperationService.process_booking(operation.model_dump(), current_user)
@@ -35,20 +38,14 @@ def book_operation(operation: OperationCreate, background_tasks: BackgroundTasks
             message=msg
         )
 
-    return {
-        "id": op["id"],
-        "patient_id": op["patient_id"],
-        "specialty": op["specialty"],
-        "date": op.get("operation_date"),
-        "doctor_id": op["doctor_id"],
-        "hospital_id": op["hospital_id"],
-        "status": op["status"],
-        "created_at": op.get("created_at"),
-        "notes": op.get("notes"),
-        "patient_name": current_user.get("name", ""),
-        "doctor_name": result["doctor"].get("name", ""),
-        "hospital_name": hospital.get("name", "")
-    }
+    response = {k: op.get(k) for k in _BOOKING_RESPONSE_FIELDS}
+    response.update(
+        date=op.get("operation_date"),
+        patient_name=current_user.get("name", ""),
+        doctor_name=result["doctor"].get("name", ""),
+        hospital_name=hospital.get("name", "")
+    )
+    return response
 
 @router.get("/my-operations", response_model=List[dict])
 def get_my_operations(current_user: dict = Depends(get_current_user)):
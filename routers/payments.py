@@ -3,7 +3,7 @@ Payments Router
 Gateway-agnostic — works with Razorpay, Cashfree, or any future gateway.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from dependencies.auth import get_current_user
 from services.payment_service import PaymentService
 from services.gateways import get_payment_gateway
@@ -128,14 +128,26 @@ async def payment_webhook_receiver(request: Request):
 
 
 @router.get("/my-payments")
-def get_my_payments(current_user: dict = Depends(get_current_user)):
-    """Fetch authenticated user's payment history."""
+def get_my_payments(
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = Query(None, description="Return payments older than this id (the last id of the previous page)"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Fetch authenticated user's payment history, newest first, one keyset page at a time.
+    Pass the returned next_cursor as before_id to get the next page; it is null on the last page.
+    """
     from core.database import get_supabase
     sb = get_supabase()
     if not sb:
         raise HTTPException(status_code=500, detail="Database unavailable")
-    result = sb.table("payments").select("*").eq("user_id", current_user["id"]).order("created_at", desc=True).execute()
-    return result.data if result.data else []
+    # Ids increase with creation time, so id order is creation order and serves as the cursor
+    q = sb.table("payments").select("*").eq("user_id", current_user["id"])
+    if before_id is not None:
+        q = q.lt("id", before_id)
+    result = q.order("id", desc=True).limit(limit).execute()
+    rows = result.data if result.data else []
+    return {"payments": rows, "next_cursor": rows[-1]["id"] if len(rows) == limit else None}
 
 
 @router.get("/gateway-info")
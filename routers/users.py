@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from dependencies.auth import get_current_user, get_current_doctor, get_current_active_user
 from services.user_service import UserService
 from services.doctor_service import DoctorService
 from schemas import UserCreate, UserLogin, UserResponse
+from models import UserRole
 from core.security import create_access_token, create_refresh_token
 from services.audit_logger import log_login_attempt
 from fastapi_limiter.depends import RateLimiter
@@ -11,22 +13,27 @@ from typing import Optional
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+# UserCreate fields copied onto the doctor profile on registration
+_DOCTOR_PROFILE_FIELDS = frozenset({
+    "hospital_id", "name", "mobile", "email", "degree", "institute_name", "experience1"
+})
+
 @router.post("/register", response_model=dict, dependencies=[Depends(RateLimiter(times=5, seconds=60))])
 async def register_user(user: UserCreate, response: Response):
     """Register a new patient or pharma user"""
-    role_str = user.role.value if hasattr(user.role, 'value') else str(user.role)
-    if role_str == "doctor":
+    if user.role is UserRole.DOCTOR:
         raise HTTPException(status_code=400, detail="Use /register-doctor endpoint")
 
     user_data = user.model_dump(exclude_unset=True)
-    user_data["role"] = role_str
+    user_data["role"] = user.role.value
     
     # Address handling
     if hasattr(user, 'address') and user.address and not user_data.get("address_line1"):
         user_data["address_line1"] = user.address
     user_data.pop("address", None)
         
-    db_user = UserService.register_user(user_data)
+    # Password hashing is CPU-bound; keep it off the event loop
+    db_user = await run_in_threadpool(UserService.register_user, user_data)
     
     access_token = create_access_token(data={"sub": str(db_user["id"]), "role": db_user["role"], "token_version": 1})
     refresh_token = create_refresh_token(data={"sub": str(db_user["id"]), "role": db_user["role"], "token_version": 1})
@@ -40,14 +47,19 @@ async def register_user(user: UserCreate, response: Response):
     }
 
 @router.post("/login", response_model=dict, dependencies=[Depends(RateLimiter(times=5, seconds=300))])
-async def login_user(user_credentials: UserLogin, request: Request, response: Response, ip: str = Depends(get_real_ip)):
+async def login_user(user_credentials: UserLogin, request: Request, response: Response, background_tasks: BackgroundTasks, ip: str = Depends(get_real_ip)):
     """Login user with brute-force protection"""
     user_agent = request.headers.get("user-agent")
     
-    user = UserService.authenticate_user(user_credentials.mobile, user_credentials.password)
-    if not user:
+    # Password verification is CPU-bound; keep it off the event loop
+    authenticated = await run_in_threadpool(UserService.authenticate_user, user_credentials.mobile, user_credentials.password)
+    if not authenticated:
         log_login_attempt(mobile=user_credentials.mobile, success=False, ip_address=ip, user_agent=user_agent)
         raise HTTPException(status_code=401, detail="Incorrect credentials")
+    
+    user, login_update = authenticated
+    # last_login_at is informational; write it after the response instead of before
+    background_tasks.add_task(UserService.record_login, user["id"], login_update)
         
     log_login_attempt(mobile=user_credentials.mobile, user_id=user["id"], success=True, ip_address=ip, user_agent=user_agent)
     
@@ -82,20 +94,12 @@ async def register_doctor(user: UserCreate):
         "password": user.password,
     }
     
-    doctor_data = {
-        "hospital_id": user.hospital_id,
-        "name": user.name,
-        "mobile": user.mobile,
-        "email": user.email,
-        "degree": user.degree,
-        "institute_name": user.institute_name,
-        "experience1": user.experience1,
-        "source": "registered"
-    }
+    doctor_data = user.model_dump(include=_DOCTOR_PROFILE_FIELDS)
+    doctor_data["source"] = "registered"
     
     # Needs to hash password first
     from core.security import get_password_hash
-    user_data["password_hash"] = get_password_hash(user_data.pop("password"))
+    user_data["password_hash"] = await run_in_threadpool(get_password_hash, user_data.pop("password"))
     user_data["is_active"] = True
     user_data["token_version"] = 1
     
@@ -113,7 +117,7 @@ async def get_all_doctors_public(q: Optional[str] = None):
 
 @router.get("/doctors/search")
 async def search_doctors(q: Optional[str] = None):
-    return DoctorService.get_public_doctors(q)
+    return DoctorService.search_doctors(q)
 
 @router.get("/cities/search")
 async def search_cities(q: Optional[str] = None):
@@ -35,7 +35,7 @@ def get_hospital_message_logs(
         )
     
     # Verify hospital exists
-    hospital_result = supabase.table("hospitals").select("id, name").eq("id", hospital_id).execute()
+    hospital_result = supabase.table("hospitals").select("id, name").eq("id", hospital_id).limit(1).execute()
     if not hospital_result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -54,7 +54,7 @@ def get_hospital_message_logs(
     return {
         "hospital_id": hospital_id,
         "hospital_name": hospital.get("name", ""),
-        "date": log_date or date.today().isoformat(),
+        "date": log_date or date.today(),
         "statistics": {
             "total": total,
             "successful": successful,
@@ -82,7 +82,7 @@ def get_failed_messages(
         )
     
     # Verify hospital exists
-    hospital_result = supabase.table("hospitals").select("id").eq("id", hospital_id).execute()
+    hospital_result = supabase.table("hospitals").select("id").eq("id", hospital_id).limit(1).execute()
     if not hospital_result.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
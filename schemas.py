@@ -1,7 +1,20 @@
-from pydantic import BaseModel, EmailStr, field_validator, model_validator, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator, model_validator, validator
 from datetime import date, datetime
 from typing import Optional, Union
-from models import UserRole, AppointmentStatus, OperationStatus, Specialty, HospitalStatus
+from models import UserRole, AppointmentStatus, OperationStatus, Specialty, HospitalStatus, TIME_SLOTS, VALID_TIME_SLOTS
+
+# Fields that must be filled in for each role on registration, with their error messages
+_REQUIRED_FIELDS_BY_ROLE = {
+    UserRole.PHARMA: (
+        ("company_name", "Company name is required for pharma professionals"),
+        ("hospital_id", "Hospital selection is required for pharma professionals"),
+    ),
+    UserRole.DOCTOR: (
+        ("degree", "Degree is required for doctors"),
+        ("institute_name", "Institute name is required for doctors"),
+        ("hospital_id", "Hospital selection is required for doctors"),
+    ),
+}
 
 # User Schemas
 class UserBase(BaseModel):
@@ -33,35 +46,24 @@ class UserCreate(UserBase):
     experience3: Optional[str] = None
     experience4: Optional[str] = None
     
-    @field_validator('password')
+    @field_validator('password', mode='before')
     @classmethod
     def validate_password(cls, v):
-        if len(v) < 6:
+        # Runs before str validation so short passwords are rejected without building the field;
+        # non-string input is left for the str validator to reject
+        if isinstance(v, str) and len(v) < 6:
             raise ValueError('Password must be at least 6 characters')
         return v
     
     @model_validator(mode='after')
     def validate_role_fields(self):
-        # Convert role to enum if it's a string
-        role_value = self.role.value if hasattr(self.role, 'value') else str(self.role)
-        
-        if role_value == "pharma" or self.role == UserRole.PHARMA:
-            if not self.company_name:
-                raise ValueError('Company name is required for pharma professionals')
-            if not self.hospital_id:
-                raise ValueError('Hospital selection is required for pharma professionals')
-        elif role_value == "patient" or self.role == UserRole.PATIENT:
-            # Hospital is optional for patients (frontend allows it to be optional)
-            pass
-        elif role_value == "doctor" or self.role == UserRole.DOCTOR:
-            # Note: Doctors are now registered via /api/users/register-doctor endpoint
-            # This validation still works for backward compatibility during migration
-            if not self.degree:
-                raise ValueError('Degree is required for doctors')
-            if not self.institute_name:
-                raise ValueError('Institute name is required for doctors')
-            if not self.hospital_id:
-                raise ValueError('Hospital selection is required for doctors')
+        # self.role is already parsed into a UserRole by the field type.
+        # Doctors are now registered via /api/users/register-doctor endpoint;
+        # their rules still apply for backward compatibility during migration.
+        # Hospital is optional for patients (frontend allows it to be optional).
+        for field_name, message in _REQUIRED_FIELDS_BY_ROLE.get(self.role, ()):
+            if not getattr(self, field_name):
+                raise ValueError(message)
         return self
 
 class UserLogin(BaseModel):
@@ -72,8 +74,7 @@ class UserResponse(UserBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Appointment Schemas
 class AppointmentBase(BaseModel):
@@ -83,15 +84,8 @@ class AppointmentBase(BaseModel):
     
     @validator('time_slot')
     def validate_time_slot(cls, v):
-        # Morning slots: 9:30 AM to 3:30 PM
-        # Evening slots: 6:00 PM to 8:30 PM
-        valid_slots = [
-            "09:30", "10:00", "10:30", "11:00", "11:30", "12:00",
-            "12:30", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30",
-            "18:00", "18:30", "19:00", "19:30", "20:00", "20:30"
-        ]
-        if v not in valid_slots:
-            raise ValueError(f'Invalid time slot. Must be one of: {", ".join(valid_slots)}')
+        if v not in VALID_TIME_SLOTS:
+            raise ValueError(f'Invalid time slot. Must be one of: {", ".join(TIME_SLOTS)}')
         return v
 
 class AppointmentCreate(AppointmentBase):
@@ -129,7 +123,7 @@ class GuestAppointmentCreate(BaseModel):
         if isinstance(v, str):
             try:
                 # Try parsing ISO format (YYYY-MM-DD)
-                return datetime.strptime(v, "%Y-%m-%d").date()
+                return date.fromisoformat(v)
             except ValueError:
                 # Try other common formats
                 try:
@@ -148,13 +142,8 @@ class GuestAppointmentCreate(BaseModel):
             if len(v) > 5:
                 v = v[:5]
         
-        valid_slots = [
-            "09:30", "10:00", "10:30", "11:00", "11:30", "12:00",
-            "12:30", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30",
-            "18:00", "18:30", "19:00", "19:30", "20:00", "20:30"
-        ]
-        if v not in valid_slots:
-            raise ValueError(f'Invalid time slot: {v}. Must be one of: {", ".join(valid_slots)}')
+        if v not in VALID_TIME_SLOTS:
+            raise ValueError(f'Invalid time slot: {v}. Must be one of: {", ".join(TIME_SLOTS)}')
         return v
 
 class AppointmentResponse(AppointmentBase):
@@ -167,8 +156,7 @@ class AppointmentResponse(AppointmentBase):
     doctor_name: Optional[str] = None
     hospital_name: Optional[str] = None  # Aligned with operations
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Operation Schemas
 class OperationBase(BaseModel):
@@ -190,8 +178,7 @@ class OperationResponse(OperationBase):
     doctor_name: Optional[str] = None
     hospital_name: Optional[str] = None  # Aligned with appointments
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Token Schema
 class Token(BaseModel):
@@ -227,6 +214,5 @@ class HospitalResponse(HospitalBase):
     registration_date: datetime
     approved_date: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
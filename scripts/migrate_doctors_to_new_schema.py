@@ -13,6 +13,18 @@ sys.path.insert(0, str(backend_dir))
 
 from core.database import get_supabase
 
+# Values per IN lookup; keeps request URLs short and each response well under PostgREST's max-rows
+LOOKUP_CHUNK_SIZE = 200
+
+def fetch_in(supabase, table, columns, column, values):
+    """Rows of table whose column is one of values, fetched with chunked IN queries"""
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        rows.extend(supabase.table(table).select(columns).in_(column, chunk).execute().data or [])
+    return rows
+
 def migrate_doctors():
     """Migrate doctors from users table to doctors table"""
     supabase = get_supabase()
@@ -35,6 +47,18 @@ def migrate_doctors():
         
         print(f"   ✅ Found {len(doctors_from_users.data)} doctors in users table")
         
+        # Look up existing doctors and hospitals for just these users, with IN queries instead of one query per doctor
+        user_ids = {d["id"] for d in doctors_from_users.data}
+        mobiles = {d["mobile"] for d in doctors_from_users.data if d.get("mobile")}
+        hospital_ids = {d["hospital_id"] for d in doctors_from_users.data if d.get("hospital_id")}
+        existing_by_user_id = {
+            d["user_id"]: d["id"] for d in fetch_in(supabase, "doctors", "id, user_id", "user_id", user_ids)
+        }
+        existing_by_name_mobile = {
+            (d["name"], d["mobile"]): d["id"] for d in fetch_in(supabase, "doctors", "id, name, mobile", "mobile", mobiles)
+        }
+        valid_hospital_ids = {h["id"] for h in fetch_in(supabase, "hospitals", "id", "id", hospital_ids)}
+        
         # Step 2: Migrate each doctor
         migrated = 0
         skipped = 0
@@ -49,16 +73,14 @@ def migrate_doctors():
             print(f"\n   Migrating doctor: {name} (ID: {user_id})")
             
             # Check if doctor already exists in doctors table
-            existing = supabase.table("doctors").select("id").eq("user_id", user_id).execute()
-            if existing.data:
-                print(f"      ⏭️  Doctor already exists in doctors table (ID: {existing.data[0]['id']})")
+            if user_id in existing_by_user_id:
+                print(f"      ⏭️  Doctor already exists in doctors table (ID: {existing_by_user_id[user_id]})")
                 skipped += 1
                 continue
             
             # Check if doctor exists by name and mobile
-            existing_by_name = supabase.table("doctors").select("id").eq("name", name).eq("mobile", mobile).execute()
-            if existing_by_name.data:
-                print(f"      ⏭️  Doctor already exists by name/mobile (ID: {existing_by_name.data[0]['id']})")
+            if (name, mobile) in existing_by_name_mobile:
+                print(f"      ⏭️  Doctor already exists by name/mobile (ID: {existing_by_name_mobile[(name, mobile)]})")
                 skipped += 1
                 continue
             
@@ -69,8 +91,7 @@ def migrate_doctors():
                 continue
             
             # Verify hospital exists
-            hospital_check = supabase.table("hospitals").select("id").eq("id", hospital_id).execute()
-            if not hospital_check.data:
+            if hospital_id not in valid_hospital_ids:
                 print(f"      ⚠️  Warning: Hospital ID {hospital_id} not found, skipping migration")
                 errors += 1
                 continue
@@ -98,6 +119,8 @@ def migrate_doctors():
                 
                 if result.data:
                     doctor_id = result.data[0]["id"]
+                    existing_by_user_id[user_id] = doctor_id
+                    existing_by_name_mobile[(name, mobile)] = doctor_id
                     print(f"      ✅ Successfully migrated (New Doctor ID: {doctor_id})")
                     migrated += 1
                 else:
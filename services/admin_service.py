@@ -1,102 +1,171 @@
+import hashlib
 import json
+import logging
+import os
+import tempfile
 from pathlib import Path
+from typing import Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_PRICING_CONFIG_PATH = Path(__file__).resolve().parent.parent / "pricing_config.json"
+
+# Served when pricing_config.json does not exist
+_DEFAULT_PRICING = {
+    "plans": [
+        {
+            "name": "Starter",
+            "price": "1",
+            "period": "month",
+            "description": "Perfect for small clinics",
+            "features": ["Up to 5 doctors", "Unlimited appointments", "Basic scheduling", "Email support"],
+            "popular": False
+        }
+    ],
+    "annual_discount": 20,
+    "currency": "INR",
+    "currency_symbol": "₹"
+}
+
+_DEFAULT_PUBLIC_PRICING = {
+    "plans": [
+        {
+            "name": "Small Clinic",
+            "description": "For 1 Doctor / 1 Hospital",
+            "installationPrice": 5001,
+            "monthlyPrice": 1111,
+            "features": [
+                "1 Doctor profile",
+                "1 Hospital",
+                "Appointment management",
+                "Email reminders",
+                "Basic analytics",
+                "Email support",
+            ],
+            "popular": False,
+        },
+        {
+            "name": "Medium (≤5 Drs)",
+            "description": "For up to 5 Doctors in 1 Hospital",
+            "installationPrice": 11000,
+            "monthlyPrice": 2111,
+            "features": [
+                "Up to 5 Doctor profiles",
+                "1 Hospital",
+                "SMS & Email reminders",
+                "Advanced analytics",
+                "Custom booking page",
+                "Payment integration",
+                "Priority support",
+            ],
+            "popular": True,
+        },
+        {
+            "name": "Corporate",
+            "description": "For 10 Doctors & 5 Hospitals",
+            "installationPrice": 21000,
+            "monthlyPrice": 5111,
+            "features": [
+                "Up to 10 Doctor profiles",
+                "Up to 5 Hospitals (same ownership)",
+                "Multi-location support",
+                "Custom integrations",
+                "Dedicated account manager",
+                "24/7 phone support",
+                "White-label option",
+            ],
+            "popular": False,
+        },
+    ],
+    "currency": "INR",
+    "currency_symbol": "₹",
+    "invoiceLabels": {
+        "installationFee": "One-Time Software Activation & License Fee",
+        "monthlyFee": "Monthly Technical Support & Maintenance Charges"
+    }
+}
 
 class AdminService:
+    # Parsed pricing_config.json and the mtime it was read at; re-read only when the file changes
+    _pricing_cache: Optional[dict] = None
+    _pricing_mtime: Optional[float] = None
+    # (source dict, encoded body, ETag) for the public pricing response, rebuilt when the source changes
+    _public_payload: Optional[Tuple[dict, bytes, str]] = None
+
     @staticmethod
     def get_pricing_config_path() -> Path:
-        return Path(__file__).parent.parent / "pricing_config.json"
+        return _PRICING_CONFIG_PATH
+
+    @classmethod
+    def _load_pricing_config(cls) -> Optional[dict]:
+        # A stat per call is far cheaper than re-parsing, and picks up edits made outside update_pricing
+        config_path = cls.get_pricing_config_path()
+        try:
+            mtime = config_path.stat().st_mtime
+            if cls._pricing_cache is None or mtime != cls._pricing_mtime:
+                with open(config_path, "r") as f:
+                    cls._pricing_cache = json.load(f)
+                cls._pricing_mtime = mtime
+        except FileNotFoundError:
+            cls._pricing_cache = None
+            cls._pricing_mtime = None
+        except json.JSONDecodeError:
+            # A hand edit in progress; keep serving the last good copy and retry on the next call
+            logger.warning("pricing_config.json is not valid JSON, using the cached pricing")
+        return cls._pricing_cache
+
+    @classmethod
+    def get_pricing_last_modified(cls) -> Optional[float]:
+        """Modification time of the loaded pricing config, or None when using the built-in defaults"""
+        if cls._load_pricing_config() is None:
+            return None
+        return cls._pricing_mtime
 
     @classmethod
     def update_pricing(cls, pricing_data: dict) -> dict:
         config_path = cls.get_pricing_config_path()
-        with open(config_path, "w") as f:
-            json.dump(pricing_data, f, indent=2)
+        # Write a sibling temp file and swap it in, so readers never see a truncated config.
+        # Each write gets its own temp file, so concurrent updates cannot interleave.
+        fd, tmp_path = tempfile.mkstemp(dir=config_path.parent, prefix=f"{config_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(pricing_data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file 0600; keep the config readable as before
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, config_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        cls._pricing_cache = pricing_data
+        cls._pricing_mtime = config_path.stat().st_mtime
         return {"message": "Pricing updated successfully", "pricing": pricing_data}
 
     @classmethod
     def get_pricing(cls) -> dict:
-        config_path = cls.get_pricing_config_path()
-        try:
-            with open(config_path, "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {
-                "plans": [
-                    {
-                        "name": "Starter",
-                        "price": "1",
-                        "period": "month",
-                        "description": "Perfect for small clinics",
-                        "features": ["Up to 5 doctors", "Unlimited appointments", "Basic scheduling", "Email support"],
-                        "popular": False
-                    }
-                ],
-                "annual_discount": 20,
-                "currency": "INR",
-                "currency_symbol": "₹"
-            }
-            
+        pricing = cls._load_pricing_config()
+        if pricing is None:
+            return _DEFAULT_PRICING
+        return pricing
+
     @classmethod
     def get_public_pricing(cls) -> dict:
-        config_path = cls.get_pricing_config_path()
-        try:
-            with open(config_path, "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {
-                "plans": [
-                    {
-                        "name": "Small Clinic",
-                        "description": "For 1 Doctor / 1 Hospital",
-                        "installationPrice": 5001,
-                        "monthlyPrice": 1111,
-                        "features": [
-                            "1 Doctor profile",
-                            "1 Hospital",
-                            "Appointment management",
-                            "Email reminders",
-                            "Basic analytics",
-                            "Email support",
-                        ],
-                        "popular": False,
-                    },
-                    {
-                        "name": "Medium (≤5 Drs)",
-                        "description": "For up to 5 Doctors in 1 Hospital",
-                        "installationPrice": 11000,
-                        "monthlyPrice": 2111,
-                        "features": [
-                            "Up to 5 Doctor profiles",
-                            "1 Hospital",
-                            "SMS & Email reminders",
-                            "Advanced analytics",
-                            "Custom booking page",
-                            "Payment integration",
-                            "Priority support",
-                        ],
-                        "popular": True,
-                    },
-                    {
-                        "name": "Corporate",
-                        "description": "For 10 Doctors & 5 Hospitals",
-                        "installationPrice": 21000,
-                        "monthlyPrice": 5111,
-                        "features": [
-                            "Up to 10 Doctor profiles",
-                            "Up to 5 Hospitals (same ownership)",
-                            "Multi-location support",
-                            "Custom integrations",
-                            "Dedicated account manager",
-                            "24/7 phone support",
-                            "White-label option",
-                        ],
-                        "popular": False,
-                    },
-                ],
-                "currency": "INR",
-                "currency_symbol": "₹",
-                "invoiceLabels": {
-                    "installationFee": "One-Time Software Activation & License Fee",
-                    "monthlyFee": "Monthly Technical Support & Maintenance Charges"
-                }
-            }
+        pricing = cls._load_pricing_config()
+        if pricing is None:
+            return _DEFAULT_PUBLIC_PRICING
+        return pricing
+
+    @classmethod
+    def get_public_pricing_payload(cls) -> Tuple[bytes, str]:
+        """Public pricing as ready-to-send JSON bytes plus a strong ETag, encoded once per pricing change"""
+        pricing = cls.get_public_pricing()
+        payload = cls._public_payload
+        if payload is None or payload[0] is not pricing:
+            body = orjson.dumps(pricing)
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+            payload = (pricing, body, etag)
+            cls._public_payload = payload
+        return payload[1], payload[2]
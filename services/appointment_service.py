@@ -1,9 +1,16 @@
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date as date_obj, datetime
 from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
-from core.database import get_supabase
-from core.security import get_password_hash
+from postgrest.exceptions import APIError
+from core.database import get_supabase, call_rpc, UNIQUE_VIOLATION_CODE
+from models import TIME_SLOTS, VALID_TIME_SLOTS
+from services.doctor_service import DoctorService
+from services.hospital_service import HospitalService
+
+# Runs lookups that can overlap with the doctor/hospital checks
+_lookup_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="booking-lookup")
 
 class AppointmentService:
     @staticmethod
@@ -12,12 +19,7 @@ class AppointmentService:
 
     @staticmethod
     def is_valid_time_slot(time_slot: str) -> bool:
-        valid_slots = [
-            "09:30", "10:00", "10:30", "11:00", "11:30", "12:00",
-            "12:30", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30",
-            "18:00", "18:30", "19:00", "19:30", "20:00", "20:30"
-        ]
-        return time_slot in valid_slots
+        return time_slot in VALID_TIME_SLOTS
 
     @classmethod
     def process_booking(cls, appointment_data: Dict[str, Any], current_user: Dict[str, Any], is_guest: bool = False) -> Dict[str, Any]:
@@ -29,11 +31,31 @@ class AppointmentService:
         if appointment_data["date"] < date_obj.today():
             raise HTTPException(status_code=400, detail="Cannot book appointment for past dates")
 
+        # Validate, check the slot and insert in one round-trip when book_appointment is deployed
+        booking = call_rpc(supabase, "book_appointment", {
+            "p_doctor_id": appointment_data["doctor_id"],
+            "p_date": str(appointment_data["date"]),
+            "p_time_slot": appointment_data["time_slot"],
+            "p_reason": appointment_data.get("reason") or "",
+            "p_user_id": current_user.get("id"),
+            "p_user_hospital_id": current_user.get("hospital_id"),
+            "p_is_guest": is_guest,
+            "p_patient_name": appointment_data.get("patient_name", "").strip() if is_guest else None,
+            "p_patient_phone": appointment_data.get("patient_phone", "").strip() if is_guest else None,
+        })
+        if booking is not None:
+            return booking
+
+        # The guest's existing account does not depend on the doctor checks; look it up concurrently
+        patient_phone = appointment_data.get("patient_phone", "").strip() if is_guest else None
+        patient_lookup = _lookup_pool.submit(
+            lambda: supabase.table("users").select("id").eq("mobile", patient_phone).eq("role", "patient").limit(1).execute()
+        ) if is_guest else None
+
         # Verify doctor
-        doctor_result = supabase.table("doctors").select("*").eq("id", appointment_data["doctor_id"]).eq("is_active", True).execute()
-        if not doctor_result.data:
+        doctor = DoctorService.get_cached_doctor(appointment_data["doctor_id"])
+        if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
-        doctor = doctor_result.data[0]
         
         hospital_id = doctor.get("hospital_id")
         if not hospital_id:
@@ -44,40 +66,37 @@ class AppointmentService:
             raise HTTPException(status_code=400, detail="Doctor does not belong to your selected hospital")
 
         # Verify hospital
-        hospital_result = supabase.table("hospitals").select("*").eq("id", hospital_id).execute()
-        if not hospital_result.data or hospital_result.data[0].get("status") not in ("approved", "ACTIVE"):
+        hospital = HospitalService.get_cached_hospital(hospital_id)
+        if not hospital or hospital.get("status") not in ("approved", "ACTIVE"):
             raise HTTPException(status_code=400, detail="Hospital not found or not approved")
 
-        hospital = hospital_result.data[0]
-
-        # Check existing booking
-        existing_result = supabase.table("appointments").select("*").eq(
-            "doctor_id", appointment_data["doctor_id"]
-        ).eq("date", str(appointment_data["date"])).eq("time_slot", appointment_data["time_slot"]).neq(
-            "status", "cancelled"
-        ).execute()
-
-        if existing_result.data:
-            raise HTTPException(status_code=400, detail="Time slot already booked")
-
         user_id = current_user.get("id")
         if is_guest:
             # Handle guest creation
-            patient_phone = appointment_data.get("patient_phone", "").strip()
-            patient_result = supabase.table("users").select("id").eq("mobile", patient_phone).eq("role", "patient").execute()
+            patient_result = patient_lookup.result()
             if patient_result.data:
                 user_id = patient_result.data[0]["id"]
             else:
-                pwd = secrets.token_urlsafe(32)
+                # Guest accounts never log in, so skip hashing and store an unusable password,
+                # as book_appointment does; verify_password rejects it like any malformed hash
                 guest_user = {
                     "name": appointment_data.get("patient_name", "").strip(),
                     "mobile": patient_phone,
                     "role": "patient",
                     "is_active": False,
-                    "password_hash": get_password_hash(pwd)
+                    "password_hash": "!" + secrets.token_hex(16)
                 }
-                guest_result = supabase.table("users").insert(guest_user).execute()
-                user_id = guest_result.data[0]["id"]
+                # users.mobile is unique, so a concurrent booking for the same new guest loses here
+                try:
+                    guest_result = supabase.table("users").insert(guest_user).execute()
+                    user_id = guest_result.data[0]["id"]
+                except APIError as e:
+                    if e.code != UNIQUE_VIOLATION_CODE:
+                        raise
+                    existing = supabase.table("users").select("id").eq("mobile", patient_phone).eq("role", "patient").limit(1).execute()
+                    if not existing.data:
+                        raise HTTPException(status_code=400, detail="Mobile number is registered to a non-patient account")
+                    user_id = existing.data[0]["id"]
 
         appointment_record = {
             "user_id": user_id,
@@ -89,7 +108,13 @@ class AppointmentService:
             "reason": appointment_data.get("reason", "")
         }
 
-        result = supabase.table("appointments").insert(appointment_record).execute()
+        # idx_appointments_unique_active_slot rejects double bookings atomically
+        try:
+            result = supabase.table("appointments").insert(appointment_record).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION_CODE:
+                raise HTTPException(status_code=400, detail="Time slot already booked")
+            raise
         db_appointment = result.data[0]
 
         return {
@@ -115,7 +140,7 @@ class AppointmentService:
     def update_status(cls, appointment_id: int, user_id: int, user_role: str, action: str) -> Dict[str, Any]:
         supabase = cls._get_db()
         
-        apt_res = supabase.table("appointments").select("*").eq("id", appointment_id).execute()
+        apt_res = supabase.table("appointments").select("user_id, doctor_id").eq("id", appointment_id).limit(1).execute()
         if not apt_res.data:
             raise HTTPException(status_code=404, detail="Appointment not found")
         apt = apt_res.data[0]
@@ -137,33 +162,60 @@ class AppointmentService:
             raise HTTPException(status_code=400, detail="Invalid action")
 
         res = supabase.table("appointments").update(update_data).eq("id", appointment_id).execute()
-        return res.data[0] if res.data else {}
+        # The appointment was deleted after the read above
+        if not res.data:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        return res.data[0]
 
     @classmethod
     def get_available_slots(cls, doctor_id: int, date_str: str) -> Dict[str, Any]:
+        availability = cls.get_available_slots_bulk(doctor_id, [date_str])
+        day = next(iter(availability["dates"].values()))
+        return {
+            "doctor_id": doctor_id,
+            "doctor_name": availability["doctor_name"],
+            "date": date_str,
+            "available_slots": day["available_slots"],
+            "booked_slots": day["booked_slots"]
+        }
+
+    @classmethod
+    def get_available_slots_bulk(cls, doctor_id: int, date_list: List[str]) -> Dict[str, Any]:
+        """Availability for several dates from a single bookings query, keyed by date"""
         supabase = cls._get_db()
+        # Normalised ISO strings, so they match the dates PostgREST returns
+        try:
+            dates = list(dict.fromkeys(date_obj.fromisoformat(d).isoformat() for d in date_list))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         
-        doc_res = supabase.table("doctors").select("*").eq("id", doctor_id).eq("is_active", True).execute()
-        if not doc_res.data:
+        # The booked-slot query does not depend on the doctor check; issue both at once
+        booked_lookup = _lookup_pool.submit(
+            lambda: supabase.table("appointments").select("date, time_slot").eq(
+                "doctor_id", doctor_id
+            ).in_("date", dates).neq("status", "cancelled").execute()
+        )
+        doctor = DoctorService.get_cached_doctor(doctor_id)
+        if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
             
-        all_slots = [
-            "09:30", "10:00", "10:30", "11:00", "11:30", "12:00",
-            "12:30", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30",
-            "18:00", "18:30", "19:00", "19:30", "20:00", "20:30"
-        ]
-        
-        booked_result = supabase.table("appointments").select("time_slot").eq(
-            "doctor_id", doctor_id
-        ).eq("date", date_str).neq("status", "cancelled").execute()
+        booked_result = booked_lookup.result()
         
-        booked_slots = [a["time_slot"] for a in (booked_result.data or [])]
-        available_slots = [s for s in all_slots if s not in booked_slots]
+        booked_by_date: Dict[str, List[str]] = {d: [] for d in dates}
+        for a in booked_result.data or []:
+            booked_by_date.setdefault(a["date"], []).append(a["time_slot"])
+
+        availability = {}
+        for d in dates:
+            booked_slots = booked_by_date[d]
+            booked = set(booked_slots)
+            availability[d] = {
+                "available_slots": [s for s in TIME_SLOTS if s not in booked],
+                "booked_slots": booked_slots
+            }
         
         return {
             "doctor_id": doctor_id,
-            "doctor_name": doc_res.data[0]["name"],
-            "date": date_str,
-            "available_slots": available_slots,
-            "booked_slots": booked_slots
+            "doctor_name": doctor["name"],
+            "dates": availability
         }
@@ -2,10 +2,120 @@
 Audit Logging Service for Legal Compliance
 Logs all critical actions for legal safety and compliance
 """
-from datetime import datetime
-from typing import Optional, Dict, Any
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+from postgrest.exceptions import APIError
+from core.config import settings
 from core.database import get_supabase
 
+logger = logging.getLogger(__name__)
+
+# get_audit_logs only looks this far back unless a start_date is given
+AUDIT_LOG_DEFAULT_WINDOW = timedelta(days=90)
+
+# Action wording that marks an appointment/operation event as an update rather than a creation;
+# matched as substrings so "updated", "cancelled", "status_change" etc. are covered
+_UPDATE_VERBS = frozenset({"update", "modif", "change", "cancel", "reschedul", "confirm", "complete", "visited"})
+
+
+def _is_update_action(action: str) -> bool:
+    action_l = action.lower()
+    return any(verb in action_l for verb in _UPDATE_VERBS)
+
+
+# Events wait here for the writer thread, which inserts them in multi-row batches
+_audit_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=settings.AUDIT_QUEUE_MAX)
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _is_row_error(exc: Exception) -> bool:
+    # Data and constraint errors (SQLSTATE classes 22/23) reject the same rows on every attempt
+    return isinstance(exc, APIError) and str(exc.code or "").startswith(("22", "23"))
+
+
+def _insert_batch(batch: List[Dict[str, Any]]):
+    # Events carry an epoch timestamp from enqueue time; format it here, off the request path
+    for event in batch:
+        event["created_at"] = datetime.fromtimestamp(event["created_at"], timezone.utc).isoformat()
+    supabase = get_supabase()
+    if not supabase:
+        # Fallback to console logging if Supabase not available
+        for event in batch:
+            logger.info("[AUDIT] %s: %s by user %s - %s", event["event_type"], event["action"], event["user_id"], event["status"])
+        return
+
+    attempts = settings.AUDIT_BATCH_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            supabase.table("audit_logs").insert(batch).execute()
+            return
+        except Exception as e:
+            if _is_row_error(e) or attempt == attempts:
+                logger.warning("[AUDIT] Batch of %d audit events failed, inserting them one at a time", len(batch), exc_info=True)
+                break
+            time.sleep(settings.AUDIT_RETRY_BACKOFF_MS / 1000 * attempt)
+
+    # A single bad row (e.g. a user_id that breaks the users FK) now only loses that event
+    for event in batch:
+        try:
+            supabase.table("audit_logs").insert(event).execute()
+        except Exception:
+            # Never fail the main operation due to audit logging issues; the event is kept in the log
+            logger.exception("[AUDIT ERROR] Failed to write audit event: %s", event)
+
+
+def _audit_writer():
+    batch_size = settings.AUDIT_BATCH_SIZE
+    batch_window = settings.AUDIT_BATCH_MS / 1000
+    stopping = False
+    while not stopping:
+        event = _audit_queue.get()
+        if event is None:
+            break
+        batch = [event]
+        deadline = time.monotonic() + batch_window
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = _audit_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is None:
+                stopping = True
+                break
+            batch.append(event)
+        _insert_batch(batch)
+
+
+def start_audit_writer():
+    """Start the background thread that flushes queued audit events"""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_audit_writer, name="audit-writer", daemon=True)
+            _writer_thread.start()
+
+
+def stop_audit_writer(timeout: float = 5.0):
+    """Flush pending audit events and stop the writer thread"""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            return
+        try:
+            _audit_queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("[AUDIT] queue full at shutdown, pending events may be lost")
+        _writer_thread.join(timeout)
+        _writer_thread = None
+
 
 def log_audit_event(
     event_type: str,
@@ -21,7 +131,7 @@ def log_audit_event(
     error_message: Optional[str] = None
 ):
     """
-    Log audit event to database
+    Queue an audit event for a batched insert into audit_logs
     
     Event Types:
     - login_attempt: Login attempts (success/failure)
@@ -44,38 +154,29 @@ def log_audit_event(
     - pricing_update: Pricing configuration changes
     - admin_action: Admin-only actions
     """
+    audit_data = {
+        "event_type": event_type,
+        "user_id": user_id,
+        "user_role": user_role,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "details": details,  # Supabase handles JSONB as dict directly
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "status": status,
+        "error_message": error_message,
+        "created_at": time.time()
+    }
+    
+    # Queued for the writer thread; the caller never waits on the database
+    if _writer_thread is None:
+        start_audit_writer()
     try:
-        supabase = get_supabase()
-        if not supabase:
-            # Fallback to console logging if Supabase not available
-            print(f"[AUDIT] {event_type}: {action} by user {user_id} - {status}")
-            return
-        
-        audit_data = {
-            "event_type": event_type,
-            "user_id": user_id,
-            "user_role": user_role,
-            "action": action,
-            "resource_type": resource_type,
-            "resource_id": resource_id,
-            "details": details,  # Supabase handles JSONB as dict directly
-            "ip_address": ip_address,
-            "user_agent": user_agent,
-            "status": status,
-            "error_message": error_message,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        
-        # Insert into audit_logs table
-        result = supabase.table("audit_logs").insert(audit_data).execute()
-        
-        if result.data:
-            return result.data[0]
-        return None
-    except Exception as e:
-        # Never fail the main operation due to audit logging issues
-        print(f"[AUDIT ERROR] Failed to log event {event_type}: {str(e)}")
-        return None
+        _audit_queue.put_nowait(audit_data)
+    except queue.Full:
+        # The writer is far behind; keep the event in the application log instead of blocking
+        logger.warning("[AUDIT] queue full, event not stored: %s: %s by user %s - %s", event_type, action, user_id, status)
 
 
 def log_login_attempt(
@@ -115,7 +216,7 @@ def log_appointment_change(
         action_details["status_change"] = f"{old_status} -> {new_status}"
     
     return log_audit_event(
-        event_type="appointment_update" if "update" in action.lower() else "appointment_create",
+        event_type="appointment_update" if _is_update_action(action) else "appointment_create",
         user_id=user_id,
         user_role=user_role,
         action=action,
@@ -142,7 +243,7 @@ def log_operation_change(
         action_details["status_change"] = f"{old_status} -> {new_status}"
     
     return log_audit_event(
-        event_type="operation_update" if "update" in action.lower() else "operation_create",
+        event_type="operation_update" if _is_update_action(action) else "operation_create",
         user_id=user_id,
         user_role=user_role,
         action=action,
@@ -258,8 +359,8 @@ def get_audit_logs(
             query = query.eq("resource_type", resource_type)
         if resource_id:
             query = query.eq("resource_id", resource_id)
-        if start_date:
-            query = query.gte("created_at", start_date)
+        # Bound the scan to the retention window by default
+        query = query.gte("created_at", start_date or (datetime.utcnow() - AUDIT_LOG_DEFAULT_WINDOW).isoformat())
         if end_date:
             query = query.lte("created_at", end_date)
         
@@ -267,7 +368,7 @@ def get_audit_logs(
         
         result = query.execute()
         return result.data if result.data else []
-    except Exception as e:
-        print(f"[AUDIT ERROR] Failed to retrieve logs: {str(e)}")
+    except Exception:
+        logger.exception("[AUDIT ERROR] Failed to retrieve logs")
         return []
 
@@ -1,47 +1,81 @@
-from typing import List, Dict, Any
-from core.database import get_supabase
+from typing import List, Dict, Any, Optional
+from postgrest.exceptions import APIError
+from core.database import get_supabase, call_rpc, UNIQUE_VIOLATION_CODE
+import threading
+import time
+
+# Searches are answered from memory when all active cities fit in one fetch.
+# Kept below PostgREST's default max-rows (1000) so a capped response is detected as "too many".
+_CITY_INDEX_MAX_ROWS = 900
+_CITY_INDEX_TTL = 3600
+
+# Served by /api/cities/popular
+DEFAULT_POPULAR_CITIES = (
+    "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai", "Kolkata",
+    "Pune", "Ahmedabad", "Jaipur", "Surat", "Lucknow", "Kanpur",
+    "Nagpur", "Indore", "Thane", "Bhopal"
+)
 
 class CityService:
+    _city_index: Optional[List[Dict[str, Any]]] = None
+    _city_index_loaded_at: Optional[float] = None
+    _city_index_lock = threading.Lock()
+
     @staticmethod
     def _get_db():
         return get_supabase()
 
     @classmethod
-    def query_city_database(cls, query: str) -> List[Dict[str, Any]]:
-        supabase = cls._get_db()
-        res = supabase.table("cities").select("city_name, state_name").ilike("city_name", f"%{query}%").eq("is_active", True).limit(20).execute()
-        
-        cities = [{"city_name": c.get("city_name", ""), "state_name": c.get("state_name", "")} for c in (res.data or [])]
-        
-        cities.sort(key=lambda x: (
-            0 if x["city_name"].lower().startswith(query.lower()) else 1,
-            x["city_name"].lower().index(query.lower()) if query.lower() in x["city_name"].lower() else 999,
-            len(x["city_name"])
-        ))
-        
-        return cities[:20]
+    def _get_city_index(cls) -> Optional[List[Dict[str, Any]]]:
+        """All active cities with lowercased names, or None if the table is too large to hold"""
+        with cls._city_index_lock:
+            loaded_at = cls._city_index_loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < _CITY_INDEX_TTL:
+                return cls._city_index
+            supabase = cls._get_db()
+            res = supabase.table("cities").select("city_name, state_name").eq("is_active", True).limit(_CITY_INDEX_MAX_ROWS + 1).execute()
+            rows = res.data or []
+            if len(rows) > _CITY_INDEX_MAX_ROWS:
+                cls._city_index = None
+            else:
+                cls._city_index = [
+                    {"city_name": c.get("city_name") or "", "state_name": c.get("state_name") or "", "_lname": (c.get("city_name") or "").lower()}
+                    for c in rows
+                ]
+            cls._city_index_loaded_at = time.monotonic()
+            return cls._city_index
 
     @classmethod
-    def get_popular_cities_from_db(cls) -> List[str]:
-        supabase = cls._get_db()
-        popular = [
-            "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai", "Kolkata",
-            "Pune", "Ahmedabad", "Jaipur", "Surat", "Lucknow", "Kanpur",
-            "Nagpur", "Indore", "Thane", "Bhopal"
-        ]
-        res = supabase.table("cities").select("city_name").eq("is_active", True).limit(15).execute()
-        if res.data:
-            popular = [city["city_name"] for city in res.data[:15]]
-        return popular
+    def _invalidate_city_index(cls):
+        with cls._city_index_lock:
+            cls._city_index_loaded_at = None
+
+    @classmethod
+    def query_city_database(cls, query_lc: str) -> List[Dict[str, Any]]:
+        """Active cities matching an already lowercased query, best matches first"""
+        q = query_lc
+        index = cls._get_city_index()
+        if index is not None:
+            # Match position doubles as the filter (-1 = no match) and the sort key
+            ranked = [(pos, c) for c in index if (pos := c["_lname"].find(q)) >= 0]
+        else:
+            supabase = cls._get_db()
+            # search_cities ranks in SQL, so the 20 rows returned are the best matches
+            cities = call_rpc(supabase, "search_cities", {"p_query": q, "p_limit": 20})
+            if cities is not None:
+                return [{"city_name": c.get("city_name") or "", "state_name": c.get("state_name") or ""} for c in cities]
+            res = supabase.table("cities").select("city_name, state_name").ilike("city_name", f"%{q}%").eq("is_active", True).limit(20).execute()
+            ranked = [((c.get("city_name") or "").lower().find(q), c) for c in (res.data or [])]
+        
+        # Prefix matches first, then earlier matches, then shorter names
+        ranked.sort(key=lambda r: (r[0] != 0, r[0] if r[0] >= 0 else 999, len(r[1].get("city_name") or "")))
+        
+        return [{"city_name": c.get("city_name", ""), "state_name": c.get("state_name", "")} for _, c in ranked[:20]]
 
     @classmethod
     def add_new_city(cls, city_data: Dict[str, Any]) -> Dict[str, Any]:
         supabase = cls._get_db()
         city_name = city_data.get("city_name", "").strip()
-        existing = supabase.table("cities").select("id").eq("city_name", city_name).execute()
-        
-        if existing.data:
-            return {"message": "City already exists", "city_name": city_name, "id": existing.data[0]["id"]}
             
         new_city = {
             "city_name": city_name,
@@ -51,5 +85,26 @@ class CityService:
             "source": "manual",
             "is_active": True
         }
-        res = supabase.table("cities").insert(new_city).execute()
+        # add_city inserts or finds the city in one round-trip
+        added = call_rpc(supabase, "add_city", {
+            "p_city_name": city_name,
+            "p_state_name": new_city["state_name"],
+            "p_district_name": new_city["district_name"],
+            "p_pincode": new_city["pincode"],
+        })
+        if added is not None:
+            if not added["inserted"]:
+                return {"message": "City already exists", "city_name": city_name, "id": added["id"]}
+            cls._invalidate_city_index()
+            return {"message": "City added successfully", "city_name": city_name, "id": added["id"]}
+
+        # idx_cities_unique_city_name rejects duplicates; only then is the existing id looked up
+        try:
+            res = supabase.table("cities").insert(new_city).execute()
+        except APIError as e:
+            if e.code != UNIQUE_VIOLATION_CODE:
+                raise
+            existing = supabase.table("cities").select("id").eq("city_name", city_name).limit(1).execute()
+            return {"message": "City already exists", "city_name": city_name, "id": existing.data[0]["id"]}
+        cls._invalidate_city_index()
         return {"message": "City added successfully", "city_name": city_name, "id": res.data[0]["id"]}
@@ -17,11 +17,22 @@ from pathlib import Path
 BACKEND_DIR = Path(__file__).parent.parent
 CSV_DIR = str(BACKEND_DIR / "appointment_exports")
 
+CSV_HEADER = ("name", "mobile", "date", "time_slot", "doctor", "specialty", "followup_date")
+
 def ensure_csv_directory():
     """Ensure CSV directory exists."""
     os.makedirs(CSV_DIR, exist_ok=True)
 
 
+def _csv_path(hospital_id: int) -> str:
+    # Filename format: hospital_{hospital_id}_appointments.csv
+    return f"{CSV_DIR}/hospital_{hospital_id}_appointments.csv"
+
+
+# Separators dropped from mobile numbers in a single translate pass
+_MOBILE_SEPARATORS = str.maketrans("", "", " -")
+
+
 def normalize_mobile(mobile: str) -> str:
     """
     Normalize mobile number to include +91 prefix.
@@ -32,11 +43,11 @@ def normalize_mobile(mobile: str) -> str:
     Returns:
         str: Mobile number with +91 prefix
     """
-    mobile = mobile.strip().replace(" ", "").replace("-", "")
+    mobile = mobile.strip().translate(_MOBILE_SEPARATORS)
     
     if mobile.startswith("+91"):
         return mobile
-    elif mobile.startswith("91") and len(mobile) == 12:
+    elif len(mobile) == 12 and mobile.startswith("91"):
         return "+" + mobile
     elif mobile.startswith("0"):
         return "+91" + mobile[1:]
@@ -72,14 +83,8 @@ def save_appointment_csv(hospital_id: int, appointment_data: Dict) -> bool:
     try:
         ensure_csv_directory()
         
-        # Filename format: hospital_{hospital_id}_appointments.csv
-        filename = f"{CSV_DIR}/hospital_{hospital_id}_appointments.csv"
-        file_exists = os.path.exists(filename)
-        
         # Normalize mobile number - Always prefix with +91
-        mobile = appointment_data.get("mobile", "")
-        if not mobile.startswith("+91"):
-            mobile = "+91" + mobile
+        mobile = normalize_mobile(appointment_data.get("mobile", ""))
         
         # Prepare row data in exact format: name,mobile,date,time_slot,doctor,specialty,followup_date
         row = [
@@ -92,23 +97,24 @@ def save_appointment_csv(hospital_id: int, appointment_data: Dict) -> bool:
             appointment_data.get("followup_date", "")
         ]
         
-        # Write to CSV - Append mode (never overwrite)
+        # Write to CSV - Append mode (never overwrite); opened per save so a rotated
+        # or deleted file is recreated instead of written to a stale handle
+        filename = _csv_path(hospital_id)
         with open(filename, "a", newline="", encoding="utf-8") as file:
             writer = csv.writer(file)
             
             # Write header if file is new
-            if not file_exists:
-                header = ["name", "mobile", "date", "time_slot", "doctor", "specialty", "followup_date"]
-                writer.writerow(header)
+            if file.tell() == 0:
+                writer.writerow(CSV_HEADER)
             
             # Append row (never overwrite)
             writer.writerow(row)
         
-        logger.info(f"Appointment saved to CSV: {filename}")
+        logger.debug("Appointment saved to CSV: %s", filename)
         return True
         
-    except Exception as e:
-        logger.error(f"Error saving appointment to CSV: {str(e)}")
+    except Exception:
+        logger.exception("Error saving appointment to CSV")
         return False
 
 
@@ -119,7 +125,7 @@ def get_appointments_csv(hospital_id: int) -> Optional[str]:
     Returns:
         str: Path to CSV file, or None if doesn't exist
     """
-    filename = f"{CSV_DIR}/hospital_{hospital_id}_appointments.csv"
+    filename = _csv_path(hospital_id)
     if os.path.exists(filename):
         return filename
     return None
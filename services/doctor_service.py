@@ -1,6 +1,16 @@
 from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
-from core.database import get_supabase
+from core.database import get_supabase, call_rpc
+from cachetools import TTLCache
+import threading
+
+_SEARCH_COLUMNS = "id, name, specialization, degree, hospital_id"
+
+# Short-lived per-process cache of active doctors used by booking and slot lookups.
+# Doctor rows are not edited through the API, so entries simply expire.
+_BOOKING_COLUMNS = "id, name, hospital_id"
+_doctor_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_doctor_cache_lock = threading.Lock()
 
 class DoctorService:
     @staticmethod
@@ -11,9 +21,14 @@ class DoctorService:
     def register_doctor(cls, doctor_data: Dict[str, Any], user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Registers a doctor and creates their user auth record"""
         supabase = cls._get_db()
-        
+
+        # register_doctor runs the hospital check and both inserts in one transaction
+        doctor = call_rpc(supabase, "register_doctor", {"p_user": user_data, "p_doctor": doctor_data})
+        if doctor is not None:
+            return doctor
+
         # Verify hospital exists and is active
-        hospital = supabase.table("hospitals").select("status").eq("id", doctor_data["hospital_id"]).execute()
+        hospital = supabase.table("hospitals").select("status").eq("id", doctor_data["hospital_id"]).limit(1).execute()
         if not hospital.data or hospital.data[0].get("status") != "ACTIVE":
             raise HTTPException(status_code=400, detail="Associated hospital is not active")
 
@@ -37,6 +52,22 @@ class DoctorService:
             
         return doc_result.data[0]
         
+    @classmethod
+    def get_cached_doctor(cls, doctor_id: int) -> Optional[Dict[str, Any]]:
+        """Active doctor's id, name and hospital_id, served from the TTL cache when possible"""
+        with _doctor_cache_lock:
+            doctor = _doctor_cache.get(doctor_id)
+        if doctor is not None:
+            return doctor
+
+        res = cls._get_db().table("doctors").select(_BOOKING_COLUMNS).eq("id", doctor_id).eq("is_active", True).limit(1).execute()
+        if not res.data:
+            return None
+        doctor = res.data[0]
+        with _doctor_cache_lock:
+            _doctor_cache[doctor_id] = doctor
+        return doctor
+
     @classmethod
     def get_public_doctors(cls, query: Optional[str] = None) -> List[Dict[str, Any]]:
         supabase = cls._get_db()
@@ -46,9 +77,23 @@ class DoctorService:
         result = db_query.execute()
         return result.data if result.data else []
         
+    @classmethod
+    def search_doctors(cls, query: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        # Autocomplete only needs the identifying columns; idx_doctors_name_trgm serves the ILIKE
+        supabase = cls._get_db()
+        db_query = supabase.table("doctors").select(_SEARCH_COLUMNS).eq("is_active", True)
+        if query:
+            db_query = db_query.ilike("name", f"%{query}%")
+        result = db_query.limit(limit).execute()
+        return result.data if result.data else []
+        
     @classmethod
     def get_cities(cls) -> List[Dict[str, Any]]:
         supabase = cls._get_db()
+        # distinct_cities dedupes in SQL; the loop below only runs when it is not deployed
+        cities = call_rpc(supabase, "distinct_cities", {})
+        if cities is not None:
+            return cities
         result = supabase.table("hospitals").select("city, state").not_.is_("city", "null").execute()
         if not result.data: return []
         
@@ -6,6 +6,7 @@ import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional, Dict
+from jinja2 import Environment
 from core.database import get_supabase
 from core.config import settings
 import logging
@@ -104,29 +105,16 @@ async def send_email(
             html_part = MIMEText(body_html, "html")
             message.attach(html_part)
         
-        # Send email
-        if smtp_config["use_ssl"]:
-            # SSL connection (port 465)
-            await aiosmtplib.send(
-                message,
-                hostname=smtp_config["host"],
-                port=smtp_config["port"],
-                username=smtp_config["username"],
-                password=smtp_config["password"],
-                use_tls=False,
-                start_tls=False
-            )
-        else:
-            # TLS connection (port 587)
-            await aiosmtplib.send(
-                message,
-                hostname=smtp_config["host"],
-                port=smtp_config["port"],
-                username=smtp_config["username"],
-                password=smtp_config["password"],
-                use_tls=True,
-                start_tls=True
-            )
+        # Send email: implicit TLS for SSL ports (465), otherwise upgrade with STARTTLS (587)
+        await aiosmtplib.send(
+            message,
+            hostname=smtp_config["host"],
+            port=smtp_config["port"],
+            username=smtp_config["username"],
+            password=smtp_config["password"],
+            use_tls=bool(smtp_config["use_ssl"]),
+            start_tls=not smtp_config["use_ssl"]
+        )
         
         logger.info(f"✅ Email sent to {to_email} using {'hospital' if hospital_id else 'global'} SMTP (hospital_id={hospital_id})")
         return True
@@ -136,6 +124,45 @@ async def send_email(
         return False
 
 
+# Admin notification for new hospital registrations, compiled once at import.
+# Autoescaping keeps registrant-supplied fields from injecting markup into the email.
+_HOSPITAL_REGISTRATION_HTML = Environment(autoescape=True).from_string("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .header { background-color: #4CAF50; color: white; padding: 20px; text-align: center; }
+        .content { padding: 20px; }
+        .section { margin: 20px 0; padding: 15px; background-color: #f9f9f9; border-left: 4px solid #4CAF50; }
+        .label { font-weight: bold; color: #555; }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h2>New Hospital Registration Request</h2>
+    </div>
+    <div class="content">
+        <div class="section">
+            <h3>Hospital Details</h3>
+            <p><span class="label">Name:</span> {{ h.get('name', 'N/A') }}</p>
+            <p><span class="label">Email:</span> {{ h.get('email', 'N/A') }}</p>
+            <p><span class="label">Mobile:</span> {{ h.get('mobile', 'N/A') }}</p>
+            <p><span class="label">Address:</span> {{ h.get('address_line1', 'N/A') }}</p>
+            <p><span class="label">City:</span> {{ h.get('city', 'N/A') }}</p>
+            <p><span class="label">State:</span> {{ h.get('state', 'N/A') }}</p>
+            <p><span class="label">Pincode:</span> {{ h.get('pincode', 'N/A') }}</p>
+            <p><span class="label">Hospital ID:</span> {{ h.get('id', 'N/A') }}</p>
+            {% if h.get('plan_name') %}<p><span class='label'>Plan:</span> {{ h.plan_name }}</p>{% endif %}
+            {% if h.get('payment_id') %}<p><span class='label'>Payment ID:</span> {{ h.payment_id }}</p>{% endif %}
+            {% if h.get('amount') %}<p><span class='label'>Payment Amount:</span> ₹{{ h.amount }}</p>{% endif %}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+
 async def send_hospital_registration_email(hospital_data: dict, hospital_id: Optional[int] = None) -> bool:
     """
     Send hospital registration email to admin using hospital's SMTP or global SMTP
@@ -183,54 +210,7 @@ Hospital ID: {hospital_data.get('id', 'N/A')}
 Please review and approve/reject this registration.
 """
     
-    # Build optional payment fields HTML
-    plan_html = ""
-    if hospital_data.get('plan_name'):
-        plan_html = f"<p><span class='label'>Plan:</span> {hospital_data.get('plan_name', 'N/A')}</p>"
-    
-    payment_id_html = ""
-    if hospital_data.get('payment_id'):
-        payment_id_html = f"<p><span class='label'>Payment ID:</span> {hospital_data.get('payment_id', 'N/A')}</p>"
-    
-    payment_amount_html = ""
-    if hospital_data.get('amount'):
-        payment_amount_html = f"<p><span class='label'>Payment Amount:</span> ₹{hospital_data.get('amount', 'N/A')}</p>"
-    
-    body_html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; }}
-        .section {{ margin: 20px 0; padding: 15px; background-color: #f9f9f9; border-left: 4px solid #4CAF50; }}
-        .label {{ font-weight: bold; color: #555; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h2>New Hospital Registration Request</h2>
-    </div>
-    <div class="content">
-        <div class="section">
-            <h3>Hospital Details</h3>
-            <p><span class="label">Name:</span> {hospital_data.get('name', 'N/A')}</p>
-            <p><span class="label">Email:</span> {hospital_data.get('email', 'N/A')}</p>
-            <p><span class="label">Mobile:</span> {hospital_data.get('mobile', 'N/A')}</p>
-            <p><span class="label">Address:</span> {hospital_data.get('address_line1', 'N/A')}</p>
-            <p><span class="label">City:</span> {hospital_data.get('city', 'N/A')}</p>
-            <p><span class="label">State:</span> {hospital_data.get('state', 'N/A')}</p>
-            <p><span class="label">Pincode:</span> {hospital_data.get('pincode', 'N/A')}</p>
-            <p><span class="label">Hospital ID:</span> {hospital_data.get('id', 'N/A')}</p>
-            {plan_html}
-            {payment_id_html}
-            {payment_amount_html}
-        </div>
-    </div>
-</body>
-</html>
-"""
+    body_html = _HOSPITAL_REGISTRATION_HTML.render(h=hospital_data)
     
     return await send_email(
         to_email=admin_email,
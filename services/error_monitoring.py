@@ -14,6 +14,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Headers never copied into error context
+_SENSITIVE_HEADERS = frozenset({"authorization", "cookie", "x-api-key"})
+
 
 def capture_exception(error: Exception, context: Optional[dict] = None):
     """Capture exception and log it"""
@@ -46,12 +49,7 @@ def log_error_with_context(error: Exception, request: Optional[Request] = None,
         }
         # Add headers (excluding sensitive ones)
         if hasattr(request, "headers"):
-            headers = dict(request.headers)
-            # Remove sensitive headers
-            sensitive_headers = ["authorization", "cookie", "x-api-key"]
-            for header in sensitive_headers:
-                headers.pop(header.lower(), None)
-            context["headers"] = headers
+            context["headers"] = {k: v for k, v in request.headers.items() if k.lower() not in _SENSITIVE_HEADERS}
     
     if user_id:
         context["user_id"] = user_id
@@ -4,15 +4,18 @@ Reads PAYMENT_GATEWAY from settings and returns the appropriate implementation.
 """
 
 import logging
+from functools import lru_cache
 from core.config import settings
 from .base import PaymentGatewayBase
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_payment_gateway() -> PaymentGatewayBase:
     """
     Returns the configured payment gateway.
+    The instance is created once per process; gateways hold no per-request state.
 
     Controlled by PAYMENT_GATEWAY env var:
       - "razorpay" (default)
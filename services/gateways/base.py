@@ -5,10 +5,22 @@ Defines the contract that all payment gateways must implement.
 
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
+import itertools
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
+# Per-process sequence so references minted within the same second stay distinct
+_reference_seq = itertools.count(1)
+_PID = os.getpid()
+
+
+def unique_reference(prefix: str) -> str:
+    """Build a gateway reference id (order, receipt, refund) that is unique across calls and workers."""
+    return f"{prefix}_{int(time.time())}_{_PID}_{next(_reference_seq)}"
+
 
 class PaymentGatewayBase(ABC):
     """Abstract base class for payment gateways (Razorpay, Cashfree, etc.)"""
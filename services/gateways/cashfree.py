@@ -8,10 +8,9 @@ import hashlib
 import base64
 import logging
 from typing import Optional, Dict, Any
-from datetime import datetime
 import requests
 from core.config import settings
-from .base import PaymentGatewayBase
+from .base import PaymentGatewayBase, unique_reference
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +23,8 @@ class CashfreeGateway(PaymentGatewayBase):
     def __init__(self):
         self._client_id = settings.CASHFREE_CLIENT_ID
         self._client_secret = settings.CASHFREE_CLIENT_SECRET
+        # Keep-alive session reused by every API call; the gateway is a per-process singleton
+        self._http = requests.Session()
         env = settings.CASHFREE_ENVIRONMENT.lower().strip()
         if env.startswith("prod"):
             self._base_url = "https://api.cashfree.com/pg"
@@ -62,14 +63,14 @@ class CashfreeGateway(PaymentGatewayBase):
         if not self._client_id or not self._client_secret:
             raise RuntimeError("Cashfree credentials not configured")
 
-        order_id = receipt or f"order_{int(datetime.now().timestamp())}"
+        order_id = receipt or unique_reference("order")
 
         payload: Dict[str, Any] = {
             "order_id": order_id,
             "order_amount": float(f"{amount:.2f}"),
             "order_currency": currency,
             "customer_details": {
-                "customer_id": f"cust_{int(datetime.now().timestamp())}",
+                "customer_id": unique_reference("cust"),
                 "customer_phone": customer_phone or "9999999999",
             },
         }
@@ -88,7 +89,7 @@ class CashfreeGateway(PaymentGatewayBase):
         if notes:
             payload["order_tags"] = {k: str(v) for k, v in notes.items()}
 
-        resp = requests.post(
+        resp = self._http.post(
             f"{self._base_url}/orders",
             headers=self._headers,
             json=payload,
@@ -141,7 +142,7 @@ class CashfreeGateway(PaymentGatewayBase):
     def get_payment_details(self, payment_id: str) -> Optional[Dict[str, Any]]:
         """Fetch order/payment details by order_id from Cashfree."""
         try:
-            resp = requests.get(
+            resp = self._http.get(
                 f"{self._base_url}/orders/{payment_id}",
                 headers=self._headers,
                 timeout=15,
@@ -156,12 +157,12 @@ class CashfreeGateway(PaymentGatewayBase):
         self, payment_id: str, amount: Optional[float] = None, notes: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         payload: Dict[str, Any] = {
-            "refund_id": f"refund_{int(datetime.now().timestamp())}",
+            "refund_id": unique_reference("refund"),
             "refund_amount": amount if amount else 0,
             "refund_note": (notes or {}).get("reason", "Refund"),
         }
         try:
-            resp = requests.post(
+            resp = self._http.post(
                 f"{self._base_url}/orders/{payment_id}/refunds",
                 headers=self._headers,
                 json=payload,
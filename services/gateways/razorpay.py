@@ -6,10 +6,9 @@ import hmac
 import hashlib
 import logging
 from typing import Optional, Dict, Any
-from datetime import datetime
 import requests
 from core.config import settings
-from .base import PaymentGatewayBase
+from .base import PaymentGatewayBase, unique_reference
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +22,8 @@ class RazorpayGateway(PaymentGatewayBase):
         self._key_id = settings.RAZORPAY_KEY_ID
         self._key_secret = settings.RAZORPAY_KEY_SECRET
         self._webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET
+        # Keep-alive session reused by every API call; the gateway is a per-process singleton
+        self._http = requests.Session()
         if self._key_id and self._key_secret:
             logger.info("✅ Razorpay gateway credentials loaded")
         else:
@@ -54,12 +55,12 @@ class RazorpayGateway(PaymentGatewayBase):
         payload = {
             "amount": int(amount * 100),  # paise
             "currency": currency,
-            "receipt": receipt or f"rcpt_{int(datetime.now().timestamp())}",
+            "receipt": receipt or unique_reference("rcpt"),
             "payment_capture": 1,
             "notes": notes or {},
         }
 
-        resp = requests.post(
+        resp = self._http.post(
             f"{RAZORPAY_BASE_URL}/orders",
             auth=self._auth,
             json=payload,
@@ -100,7 +101,7 @@ class RazorpayGateway(PaymentGatewayBase):
         if not self._key_id or not self._key_secret:
             return None
         try:
-            resp = requests.get(
+            resp = self._http.get(
                 f"{RAZORPAY_BASE_URL}/payments/{payment_id}",
                 auth=self._auth,
                 timeout=15,
@@ -120,7 +121,7 @@ class RazorpayGateway(PaymentGatewayBase):
         if amount:
             payload["amount"] = int(amount * 100)
         try:
-            resp = requests.post(
+            resp = self._http.post(
                 f"{RAZORPAY_BASE_URL}/payments/{payment_id}/refund",
                 auth=self._auth,
                 json=payload,
@@ -150,7 +151,7 @@ class RazorpayGateway(PaymentGatewayBase):
             ]
         }
         try:
-            resp = requests.post(
+            resp = self._http.post(
                 f"{RAZORPAY_BASE_URL}/payments/{payment_id}/transfers",
                 auth=self._auth,
                 json=payload,
@@ -2,18 +2,78 @@ from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
 from core.database import get_supabase
 from datetime import datetime
+from cachetools import TTLCache
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Short-lived per-process cache of hospital rows used by booking validation.
+# Hospital status changes rarely; every update below invalidates its entry.
+_hospital_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_hospital_cache_lock = threading.Lock()
+
+# Columns exposed by the public hospital endpoints; SMTP credentials and
+# WhatsApp templates stay server-side
+_PUBLIC_COLUMNS = (
+    "id, name, email, mobile, status, created_at, "
+    "address_line1, address_line2, address_line3, city, state, pincode, "
+    "registration_date, approved_date, plan, expiry_date, is_active, "
+    "upi_id, gpay_upi_id, phonepay_upi_id, paytm_upi_id, bhim_upi_id"
+)
 
 class HospitalService:
     @staticmethod
     def _get_db():
         return get_supabase()
 
+    @staticmethod
+    def _refresh_cache(hospital_id: int, rows: List[Dict[str, Any]]):
+        """Store the row returned by an update so the next booking check needs no fetch"""
+        with _hospital_cache_lock:
+            if rows:
+                _hospital_cache[hospital_id] = rows[0]
+            else:
+                _hospital_cache.pop(hospital_id, None)
+
+    @classmethod
+    def warm_cache(cls):
+        """Preload bookable hospitals at startup so the first bookings skip the lookup"""
+        supabase = cls._get_db()
+        if not supabase:
+            return
+        try:
+            res = supabase.table("hospitals").select("*").in_("status", ["approved", "ACTIVE"]).execute()
+        except Exception:
+            logger.exception("Failed to warm hospital cache")
+            return
+        with _hospital_cache_lock:
+            for hospital in res.data or []:
+                _hospital_cache[hospital["id"]] = hospital
+        logger.info("Hospital cache warmed with %d hospitals", len(res.data or []))
+
+    @classmethod
+    def get_cached_hospital(cls, hospital_id: int) -> Optional[Dict[str, Any]]:
+        """Hospital row for booking checks, served from the TTL cache when possible"""
+        with _hospital_cache_lock:
+            hospital = _hospital_cache.get(hospital_id)
+        if hospital is not None:
+            return hospital
+
+        res = cls._get_db().table("hospitals").select("*").eq("id", hospital_id).execute()
+        if not res.data:
+            return None
+        hospital = res.data[0]
+        with _hospital_cache_lock:
+            _hospital_cache[hospital_id] = hospital
+        return hospital
+
     @classmethod
     def register_hospital(cls, hospital_data: Dict[str, Any], payment_id: int) -> Dict[str, Any]:
         supabase = cls._get_db()
 
         # Check Payment Status
-        payment_check = supabase.table("payments").select("*").eq("id", payment_id).execute()
+        payment_check = supabase.table("payments").select("status, hospital_id").eq("id", payment_id).execute()
         if not payment_check.data or payment_check.data[0].get("status") != "COMPLETED":
             raise HTTPException(status_code=400, detail="Invalid or incomplete payment")
         
@@ -22,7 +82,7 @@ class HospitalService:
             raise HTTPException(status_code=400, detail="Payment already used")
 
         # Check email exists
-        if supabase.table("hospitals").select("id").eq("email", hospital_data["email"]).execute().data:
+        if supabase.table("hospitals").select("id").eq("email", hospital_data["email"]).limit(1).execute().data:
             raise HTTPException(status_code=400, detail="Hospital email already registered")
 
         hospital_data["status"] = "pending"
@@ -40,7 +100,7 @@ class HospitalService:
     @classmethod
     def get_public_hospitals(cls, status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         supabase = cls._get_db()
-        q = supabase.table("hospitals").select("*")
+        q = supabase.table("hospitals").select(_PUBLIC_COLUMNS)
         if status_filter:
             q = q.eq("status", status_filter)
         res = q.order("created_at", desc=True).execute()
@@ -49,7 +109,7 @@ class HospitalService:
     @classmethod
     def get_hospital_by_id(cls, hospital_id: int) -> Dict[str, Any]:
         supabase = cls._get_db()
-        res = supabase.table("hospitals").select("*").eq("id", hospital_id).execute()
+        res = supabase.table("hospitals").select(_PUBLIC_COLUMNS).eq("id", hospital_id).execute()
         if not res.data:
             raise HTTPException(status_code=404, detail="Hospital not found")
         return res.data[0]
@@ -63,6 +123,7 @@ class HospitalService:
             
         update_data = {"status": new_status, "approved_date": datetime.utcnow().isoformat() if new_status == "approved" else None}
         res = supabase.table("hospitals").update(update_data).eq("id", hospital_id).execute()
+        cls._refresh_cache(hospital_id, res.data)
         
         if not res.data:
             raise HTTPException(status_code=404, detail="Hospital not found or update failed")
@@ -72,6 +133,7 @@ class HospitalService:
     def update_whatsapp_settings(cls, hospital_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
         supabase = cls._get_db()
         res = supabase.table("hospitals").update(updates).eq("id", hospital_id).execute()
+        cls._refresh_cache(hospital_id, res.data)
         if not res.data:
             raise HTTPException(status_code=404, detail="Hospital not found")
         return res.data[0]
@@ -80,6 +142,7 @@ class HospitalService:
     def update_smtp_settings(cls, hospital_id: int, updates: Dict[str, Any]) -> Dict[str, Any]:
         supabase = cls._get_db()
         res = supabase.table("hospitals").update(updates).eq("id", hospital_id).execute()
+        cls._refresh_cache(hospital_id, res.data)
         if not res.data:
             raise HTTPException(status_code=404, detail="Hospital not found")
         return res.data[0]
@@ -3,8 +3,8 @@ Message Logger Service
 Logs all WhatsApp messages sent for audit and tracking
 """
 import logging
-import json
 import os
+import orjson
 from datetime import datetime
 from typing import Dict, Optional, List
 
@@ -12,10 +12,14 @@ logger = logging.getLogger(__name__)
 
 # Directory for message logs
 LOG_DIR = "./whatsapp_logs"
+_log_dir_ready = False
 
 def ensure_log_directory():
-    """Ensure log directory exists."""
-    os.makedirs(LOG_DIR, exist_ok=True)
+    """Ensure log directory exists (created once per process)."""
+    global _log_dir_ready
+    if not _log_dir_ready:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        _log_dir_ready = True
 
 
 def log_message(
@@ -40,8 +44,9 @@ def log_message(
     try:
         ensure_log_directory()
         
+        now = datetime.utcnow()
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now,
             "hospital_id": hospital_id,
             "mobile": mobile,
             "message": message[:200],  # Truncate long messages
@@ -51,20 +56,21 @@ def log_message(
         }
         
         # Log to file (one file per hospital per day)
-        log_date = datetime.utcnow().strftime("%Y-%m-%d")
+        log_date = now.strftime("%Y-%m-%d")
         log_file = f"{LOG_DIR}/hospital_{hospital_id}_{log_date}.jsonl"
         
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        # orjson writes the datetime as ISO 8601 directly
+        with open(log_file, "ab") as f:
+            f.write(orjson.dumps(log_entry) + b"\n")
         
         # Also log to application logger
         if status == "success":
-            logger.info(f"Message logged: {mobile} - {status}")
+            logger.debug("Message logged: %s - %s", mobile, status)
         else:
-            logger.warning(f"Message logged: {mobile} - {status} - {error}")
+            logger.warning("Message logged: %s - %s - %s", mobile, status, error)
             
-    except Exception as e:
-        logger.error(f"Error logging message: {str(e)}")
+    except Exception:
+        logger.exception("Error logging message")
 
 
 def get_message_logs(
@@ -84,8 +90,6 @@ def get_message_logs(
         List of log entries
     """
     try:
-        ensure_log_directory()
-        
         if date:
             log_file = f"{LOG_DIR}/hospital_{hospital_id}_{date}.jsonl"
         else:
@@ -97,17 +101,17 @@ def get_message_logs(
             return []
         
         logs = []
-        with open(log_file, "r", encoding="utf-8") as f:
+        with open(log_file, "rb") as f:
             for line in f:
                 if line.strip():
-                    entry = json.loads(line)
+                    entry = orjson.loads(line)
                     if not status or entry.get("status") == status:
                         logs.append(entry)
         
         return logs
         
-    except Exception as e:
-        logger.error(f"Error reading message logs: {str(e)}")
+    except Exception:
+        logger.exception("Error reading message logs")
         return []
 
 
@@ -4,6 +4,7 @@ Hospital-specific customizable message templates
 """
 from typing import Optional
 from datetime import datetime
+from models import TIME_SLOTS
 
 def format_date(date_obj) -> str:
     """Format date object to readable string."""
@@ -15,21 +16,23 @@ def format_date(date_obj) -> str:
         return str(date_obj)
 
 
+def _to_12_hour(time_slot: str) -> str:
+    # Convert "10:30" to "10:30 AM" or "14:30" to "2:30 PM"
+    hour, minute = map(int, time_slot.split(":"))
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+# Display labels for the bookable slots, computed once at import
+_SLOT_LABELS = {slot: _to_12_hour(slot) for slot in TIME_SLOTS}
+
+
 def format_time(time_slot: str) -> str:
     """Format time slot to readable format."""
+    label = _SLOT_LABELS.get(time_slot)
+    if label is not None:
+        return label
     try:
-        # Convert "10:30" to "10:30 AM" or "14:30" to "2:30 PM"
-        hour, minute = map(int, time_slot.split(":"))
-        if hour < 12:
-            period = "AM"
-            if hour == 0:
-                hour = 12
-        else:
-            period = "PM"
-            if hour > 12:
-                hour -= 12
-        
-        return f"{hour}:{minute:02d} {period}"
+        return _to_12_hour(time_slot)
     except:
         return time_slot
 
@@ -77,8 +80,7 @@ def get_confirmation_message(
     # Format date as "10 Feb" (day and month only)
     try:
         if isinstance(date, str):
-            from datetime import datetime
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
+            date_obj = datetime.fromisoformat(date)
         else:
             date_obj = date
         formatted_date = date_obj.strftime("%d %b")  # "10 Feb"
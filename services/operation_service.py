@@ -1,7 +1,9 @@
 from typing import Dict, Any, List
 from datetime import date
 from fastapi import HTTPException
-from core.database import get_supabase
+from core.database import get_supabase, call_rpc
+from models import Specialty
+from services.hospital_service import HospitalService
 
 class OperationService:
     @staticmethod
@@ -15,6 +17,20 @@ class OperationService:
         if operation_data["date"] < date.today():
             raise HTTPException(status_code=400, detail="Cannot book operation for past dates")
 
+        specialty = Specialty(operation_data.get("specialty")).value
+
+        # Validate and insert in one round-trip when book_operation is deployed
+        booking = call_rpc(supabase, "book_operation", {
+            "p_patient_id": current_user["id"],
+            "p_doctor_id": operation_data["doctor_id"],
+            "p_date": str(operation_data["date"]),
+            "p_specialty": specialty,
+            "p_notes": operation_data.get("notes"),
+            "p_user_hospital_id": current_user.get("hospital_id"),
+        })
+        if booking is not None:
+            return booking
+
         # Verify doctor
         doctor_result = supabase.table("doctors").select("*").eq("id", operation_data["doctor_id"]).eq("is_active", True).execute()
         if not doctor_result.data:
@@ -31,14 +47,13 @@ class OperationService:
             raise HTTPException(status_code=400, detail="Doctor does not belong to your selected hospital")
 
         # Verify hospital is approved
-        hospital_result = supabase.table("hospitals").select("*").eq("id", hospital_id).execute()
-        if not hospital_result.data or hospital_result.data[0].get("status") != "approved":
+        hospital = HospitalService.get_cached_hospital(hospital_id)
+        if not hospital or hospital.get("status") != "approved":
             raise HTTPException(status_code=400, detail="Cannot book operation with unapproved hospital")
-        hospital = hospital_result.data[0]
 
         operation_record = {
             "patient_id": current_user["id"],
-            "specialty": str(operation_data.get("specialty")),
+            "specialty": specialty,
             "operation_date": str(operation_data["date"]),
             "doctor_id": operation_data["doctor_id"],
             "hospital_id": hospital_id,
@@ -80,7 +95,7 @@ class OperationService:
         q = supabase.table("operations").select("*, doctors(name), users(name), hospitals(name)").eq("specialty", specialty)
         
         if is_doctor:
-            doctor_check = supabase.table("doctors").select("id").eq("user_id", user_id).eq("is_active", True).execute()
+            doctor_check = supabase.table("doctors").select("id").eq("user_id", user_id).eq("is_active", True).limit(1).execute()
             if not doctor_check.data:
                 return []
             q = q.eq("doctor_id", doctor_check.data[0]["id"])
@@ -94,7 +109,7 @@ class OperationService:
     def update_status(cls, operation_id: int, user_id: int, action: str) -> Dict[str, Any]:
         supabase = cls._get_db()
         
-        op_res = supabase.table("operations").select("*").eq("id", operation_id).execute()
+        op_res = supabase.table("operations").select("patient_id, doctor_id").eq("id", operation_id).execute()
         if not op_res.data:
             raise HTTPException(status_code=404, detail="Operation not found")
         op = op_res.data[0]
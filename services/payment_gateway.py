@@ -6,11 +6,12 @@ Supports Razorpay (primary) and UPI fallback
 import hmac
 import hashlib
 import json
+import secrets
 from typing import Optional, Dict, Any
-from datetime import datetime
 import requests
 import logging
 from core.config import settings
+from services.gateways.base import unique_reference
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ class PaymentGateway:
             payload = {
                 "amount": amount_in_paise,
                 "currency": currency,
-                "receipt": receipt or f"receipt_{int(datetime.now().timestamp())}",
+                "receipt": receipt or unique_reference("receipt"),
                 "notes": notes or {}
             }
             
@@ -86,7 +87,8 @@ class PaymentGateway:
     @staticmethod
     def _create_upi_order(amount: float, receipt: Optional[str], notes: Optional[Dict]) -> Dict[str, Any]:
         """Create a UPI-based order (fallback when Razorpay not configured)"""
-        order_id = f"UPI_{int(datetime.now().timestamp())}"
+        # No gateway vouches for this id, so make it unguessable rather than sequential
+        order_id = f"UPI_{secrets.token_hex(8)}"
         return {
             "order_id": order_id,
             "amount": amount,
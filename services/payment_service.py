@@ -5,12 +5,12 @@ Uses the gateway abstraction layer so all logic works with both Razorpay and Cas
 
 import logging
 from typing import Dict, Any, Optional
-from datetime import datetime
 
 from fastapi import HTTPException
 from core.database import get_supabase
 from core.config import settings
 from services.gateways import get_payment_gateway
+from services.gateways.base import unique_reference
 
 logger = logging.getLogger(__name__)
 
@@ -103,7 +103,7 @@ class PaymentService:
 
         import re
         clean_plan = re.sub(r'[^A-Za-z0-9_-]', '', plan_name)
-        receipt = f"HOSP_REG_{clean_plan}_{int(datetime.now().timestamp())}"
+        receipt = unique_reference(f"HOSP_REG_{clean_plan}")
         notes = {"type": "hospital_registration", "plan": clean_plan}
 
         order = gateway.create_order(
@@ -183,8 +183,9 @@ class PaymentService:
         # ── Find payment in DB ──
         db_payment = (
             supabase.table("payments")
-            .select("*")
+            .select("id, appointment_id, amount")
             .eq("razorpay_order_id", gw_order_id)
+            .limit(1)
             .execute()
         )
         if not db_payment.data:
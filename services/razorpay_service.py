@@ -5,7 +5,7 @@ Handles payment order creation, webhook processing, and verification
 
 import os
 import json
-import hashlib
+import secrets
 import time
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -34,9 +34,8 @@ class RazorpayService:
         """
         timestamp = int(time.time())
         reference_id = appointment_id or operation_id or 0
-        hash_input = f"{user_id}_{reference_id}_{timestamp}"
-        hash_value = hashlib.md5(hash_input.encode()).hexdigest()[:8]
-        return f"{user_id}_{reference_id}_{timestamp}_{hash_value}"
+        # Random suffix keeps keys unique within the same second without hashing
+        return f"{user_id}_{reference_id}_{timestamp}_{secrets.token_hex(4)}"
     
     @staticmethod
     def create_razorpay_order(amount: float, currency: str, user_id: int,
@@ -175,11 +174,11 @@ class RazorpayService:
             return False
         
         try:
-            result = supabase.table("payment_webhooks").select("id, processed").eq(
+            result = supabase.table("payment_webhooks").select("processed").eq(
                 "webhook_id", webhook_id
-            ).execute()
+            ).limit(1).execute()
             
-            if result.data and len(result.data) > 0:
+            if result.data:
                 return result.data[0].get("processed", False)
             return False
         except Exception as e:
@@ -1,7 +1,8 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from fastapi import HTTPException, status
-from core.database import get_supabase
-from core.security import get_password_hash, verify_password
+from postgrest.exceptions import APIError
+from core.database import get_supabase, UNIQUE_VIOLATION_CODE
+from core.security import get_password_hash, verify_password, password_needs_rehash
 from datetime import datetime
 
 class UserService:
@@ -22,16 +23,17 @@ class UserService:
     def register_user(cls, user_data: Dict[str, Any]) -> Dict[str, Any]:
         supabase = cls._get_db()
         
-        # Check existing
-        if cls.get_user_by_mobile(user_data["mobile"]):
-            raise HTTPException(status_code=400, detail="Mobile already registered")
-            
-        # Insert
         user_data["password_hash"] = get_password_hash(user_data.pop("password"))
         user_data["is_active"] = True
         user_data["token_version"] = 1
         
-        result = supabase.table("users").insert(user_data).execute()
+        # Insert; the UNIQUE constraint on users.mobile rejects duplicates atomically
+        try:
+            result = supabase.table("users").insert(user_data).execute()
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION_CODE:
+                raise HTTPException(status_code=400, detail="Mobile already registered")
+            raise
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create user")
             
@@ -40,19 +42,26 @@ class UserService:
         return user
 
     @classmethod
-    def authenticate_user(cls, mobile: str, password: str) -> Optional[Dict[str, Any]]:
+    def authenticate_user(cls, mobile: str, password: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Verify credentials; returns the user and the last-login update to apply via record_login"""
         user = cls.get_user_by_mobile(mobile)
         if not user or not user.get("is_active"):
             return None
         if not verify_password(password, user["password_hash"]):
             return None
             
-        # Update last login
-        supabase = cls._get_db()
-        supabase.table("users").update({"last_login_at": datetime.now().isoformat()}).eq("id", user["id"]).execute()
+        # Upgrade legacy/outdated password hashes in the same write as last login
+        login_update = {"last_login_at": datetime.now().isoformat()}
+        if password_needs_rehash(user["password_hash"]):
+            login_update["password_hash"] = get_password_hash(password)
         
         user.pop("password_hash", None)
-        return user
+        return user, login_update
+
+    @classmethod
+    def record_login(cls, user_id: int, login_update: Dict[str, Any]) -> None:
+        """Persist last-login bookkeeping; run after the login response has been sent"""
+        cls._get_db().table("users").update(login_update).eq("id", user_id).execute()
 
     @classmethod
     def revoke_token(cls, token: str, expires_at: datetime):
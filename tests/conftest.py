@@ -1,9 +1,10 @@
 import os
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
 from typing import AsyncGenerator
-import json
 from unittest.mock import MagicMock
+from postgrest.exceptions import APIError
 
 # Set test environment vars before importing app
 os.environ["ENVIRONMENT"] = "testing"
@@ -13,53 +14,90 @@ os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "dummy"
 os.environ["JWT_SECRET"] = "super-secret-test-key-32-chars-long"
 
 from main import app
-from core.database import get_supabase
-from core.limiter import init_redis
+from core.database import RPC_NOT_FOUND_CODE
 from fastapi_limiter import FastAPILimiter
+import fakeredis
 import fakeredis.aioredis
+from services import doctor_service, hospital_service
+from services.city_service import CityService
+from routers import cities
+from services.audit_logger import stop_audit_writer
+
+# Query builder methods that return the builder itself
+_CHAIN_METHODS = (
+    "select", "insert", "update", "delete", "upsert", "eq", "neq", "in_", "ilike",
+    "gte", "lte", "lt", "gt", "limit", "order", "range",
+)
+
+def make_chain(return_val):
+    chain = MagicMock()
+    for method in _CHAIN_METHODS:
+        getattr(chain, method).return_value = chain
+    chain.execute.return_value = MagicMock(data=return_val)
+    return chain
+
+def rpc_not_found(name, params):
+    raise APIError({"code": RPC_NOT_FOUND_CODE, "message": f"Could not find the function public.{name}"})
 
 # Mock Supabase
 @pytest.fixture
 def mock_supabase(mocker):
-    mock = mocker.patch("core.database.supabase_client")
     mock_instance = MagicMock()
-    
-    # Simple chain mocking setup
-    def make_chain(return_val):
-        chain = MagicMock()
-        chain.select.return_value = chain
-        chain.insert.return_value = chain
-        chain.update.return_value = chain
-        chain.delete.return_value = chain
-        chain.eq.return_value = chain
-        chain.neq.return_value = chain
-        chain.limit.return_value = chain
-        chain.order.return_value = chain
-        chain.execute.return_value = MagicMock(data=return_val)
-        return chain
-    
+
     # Store dynamic tables
     tables = {}
-    
+
     def table_func(table_name):
         if table_name not in tables:
             tables[table_name] = make_chain([])
         return tables[table_name]
-        
+
     mock_instance.table.side_effect = table_func
-    
-    mocker.patch("core.database.get_supabase", return_value=mock_instance)
-    return mock_instance
+    # Database functions are not deployed unless a test says otherwise, so services use table queries
+    mock_instance.rpc.side_effect = rpc_not_found
+
+    # Services resolve the client through core.database.get_supabase, which returns this global
+    mocker.patch("core.database.supabase", mock_instance)
+    mocker.patch("core.database._missing_rpcs", set())
+    yield mock_instance
+    # Flush audit events queued by the test while the mock is still in place
+    stop_audit_writer()
+
+@pytest.fixture
+def mock_rpc(mock_supabase):
+    """Database functions deployed in the mock: name -> returned data, or an exception to raise"""
+    results = {}
+
+    def rpc(name, params):
+        if name not in results:
+            rpc_not_found(name, params)
+        result = results[name]
+        if isinstance(result, Exception):
+            raise result
+        return make_chain(result)
+
+    mock_supabase.rpc.side_effect = rpc
+    return results
 
 @pytest.fixture(autouse=True)
+def reset_caches():
+    """Per-process caches would otherwise carry rows from one test's mock into the next"""
+    yield
+    hospital_service._hospital_cache.clear()
+    doctor_service._doctor_cache.clear()
+    CityService._invalidate_city_index()
+    cities.city_search_cache.clear()
+
+@pytest_asyncio.fixture(autouse=True)
 async def setup_redis_limiter():
     """Setup Fake Redis for rate limiter in tests"""
-    redis_conn = fakeredis.aioredis.FakeRedis()
+    # A fresh server per test, so rate-limit counters do not carry over between tests
+    redis_conn = fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
     await FastAPILimiter.init(redis_conn)
     yield
     await redis_conn.close()
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         yield client
@@ -0,0 +1,42 @@
+import json
+import threading
+import pytest
+from services import admin_service
+from services.admin_service import AdminService
+
+@pytest.fixture
+def pricing_path(tmp_path, monkeypatch):
+    path = tmp_path / "pricing_config.json"
+    monkeypatch.setattr(admin_service, "_PRICING_CONFIG_PATH", path)
+    monkeypatch.setattr(AdminService, "_pricing_cache", None)
+    monkeypatch.setattr(AdminService, "_pricing_mtime", None)
+    return path
+
+def test_update_pricing_replaces_the_config(pricing_path):
+    AdminService.update_pricing({"plans": [], "currency": "INR"})
+
+    assert json.loads(pricing_path.read_text()) == {"plans": [], "currency": "INR"}
+    assert AdminService.get_pricing() == {"plans": [], "currency": "INR"}
+    # Only the config itself is left behind
+    assert [p.name for p in pricing_path.parent.iterdir()] == ["pricing_config.json"]
+
+def test_concurrent_pricing_updates_do_not_collide(pricing_path):
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(20):
+                AdminService.update_pricing({"plans": [], "writer": n, "revision": i})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    # The file holds one complete write, whichever landed last
+    assert json.loads(pricing_path.read_text())["revision"] == 19
+    assert [p.name for p in pricing_path.parent.iterdir()] == ["pricing_config.json"]
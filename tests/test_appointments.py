@@ -1,38 +1,47 @@
 import pytest
+from unittest.mock import MagicMock
+from fastapi import HTTPException
 from httpx import AsyncClient
+from postgrest.exceptions import APIError
 from core.security import create_access_token
+from services.appointment_service import AppointmentService
 
 @pytest.mark.asyncio
 async def test_book_appointment_success(async_client: AsyncClient, mock_supabase):
     # Setup auth token
     token = create_access_token({"sub": "1", "role": "patient", "token_version": 1})
     
-    # Needs to mock: table.doctors, table.hospitals, table.appointments
-    def side_effect(*args, **kwargs):
-        table_name = args[0]
-        m = mock_supabase._mock_children['table'].return_value
-        
-        if table_name == "users":
-            m.execute.return_value.data = [{"id": 1, "is_active": True, "token_version": 1}]
-        elif table_name == "doctors":
-            m.execute.return_value.data = [{"id": 5, "hospital_id": 10, "is_active": True, "name": "Dr. Smith"}]
-        elif table_name == "hospitals":
-            m.execute.return_value.data = [{"id": 10, "status": "approved", "name": "City Care"}]
-        elif table_name == "appointments":
-            # For select (checking existing)
-            m.execute.return_value.data = []
-            
-        return m
-
-    mock_supabase.table.side_effect = side_effect
-    
-    # Overwrite insert for appointments specifically
-    class MockInsert:
-        def execute(self):
-            return type('obj', (object,), {"data": [{"id": 100, "user_id": 1, "doctor_id": 5, "date": "2030-01-01", "time_slot": "10:00", "status": "pending"}]})()
-    
-    # This is a bit tricky to mock perfectly without fully faking Supabase.
-    # We will just test the guest booking missing fields
+    # book_appointment is not deployed in the mock, so the table-query path runs
+    mock_supabase.table("users").execute.return_value.data = [{"id": 1, "name": "Test User", "is_active": True, "token_version": 1}]
+    mock_supabase.table("doctors").execute.return_value.data = [{"id": 5, "hospital_id": 10, "name": "Dr. Smith"}]
+    mock_supabase.table("hospitals").execute.return_value.data = [{"id": 10, "status": "approved", "name": "City Care"}]
+    mock_supabase.table("appointments").execute.return_value.data = [
+        {"id": 100, "user_id": 1, "doctor_id": 5, "hospital_id": 10, "date": "2030-01-01", "time_slot": "10:00", "status": "pending"}
+    ]
+    
+    response = await async_client.post(
+        "/api/appointments/book",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "doctor_id": 5,
+            "date": "2030-01-01",
+            "time_slot": "10:00"
+        }
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == 100
+    assert data["doctor_name"] == "Dr. Smith"
+    assert data["hospital_name"] == "City Care"
+    inserted = mock_supabase.table("appointments").insert.call_args.args[0]
+    assert inserted["user_id"] == 1
+    assert inserted["hospital_id"] == 10
+
+@pytest.mark.asyncio
+async def test_book_appointment_invalid_slot(async_client: AsyncClient, mock_supabase):
+    token = create_access_token({"sub": "1", "role": "patient", "token_version": 1})
+    mock_supabase.table("users").execute.return_value.data = [{"id": 1, "is_active": True, "token_version": 1}]
     
     response = await async_client.post(
         "/api/appointments/book",
@@ -44,8 +53,10 @@ async def test_book_appointment_success(async_client: AsyncClient, mock_supabase
         }
     )
     
-    assert response.status_code == 400
-    assert "Invalid time slot" in response.json()["detail"]
+    # Rejected by the request schema before the service runs
+    assert response.status_code == 422
+    assert "Invalid time slot" in response.json()["detail"][0]["message"]
+    mock_supabase.table("appointments").insert.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_book_guest_appointment(async_client: AsyncClient, mock_supabase):
@@ -63,3 +74,137 @@ async def test_book_guest_appointment(async_client: AsyncClient, mock_supabase):
     
     # We didn't fully mock doctors for guest so it might fail with 404. Let's verify the mock failure handling.
     assert response.status_code in [404, 200, 500] 
+
+GUEST_BOOKING = {
+    "doctor_id": 5,
+    "date": "2030-01-01",
+    "time_slot": "10:00",
+    "patient_name": "John Doe",
+    "patient_phone": "9998887776"
+}
+
+def mock_bookable_doctor(mock_supabase):
+    mock_supabase.table("doctors").execute.return_value.data = [{"id": 5, "hospital_id": 10, "name": "Dr. Smith"}]
+    mock_supabase.table("hospitals").execute.return_value.data = [{"id": 10, "status": "approved", "name": "City Care"}]
+    mock_supabase.table("appointments").execute.return_value.data = [
+        {"id": 100, "doctor_id": 5, "hospital_id": 10, "date": "2030-01-01", "time_slot": "10:00", "status": "pending"}
+    ]
+
+@pytest.mark.asyncio
+async def test_book_guest_appointment_through_book_appointment(async_client: AsyncClient, mock_supabase, mock_rpc):
+    mock_rpc["book_appointment"] = {
+        "appointment": {"id": 100, "doctor_id": 5, "hospital_id": 10, "date": "2030-01-01", "time_slot": "10:00", "status": "pending"},
+        "hospital": {"id": 10, "name": "City Care"},
+        "doctor": {"id": 5, "name": "Dr. Smith"},
+        "user_id": 42
+    }
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 200
+    assert response.json()["id"] == 100
+    name, params = mock_supabase.rpc.call_args.args
+    assert name == "book_appointment"
+    assert params["p_is_guest"] is True
+    assert params["p_patient_phone"] == "9998887776"
+    # Validation and inserts all happened inside the function
+    mock_supabase.table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_book_appointment_function_errors_reach_the_client(async_client: AsyncClient, mock_rpc):
+    mock_rpc["book_appointment"] = APIError({"code": "P0001", "message": "Time slot already booked", "hint": "400"})
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Time slot already booked"
+
+@pytest.mark.asyncio
+async def test_book_guest_creates_patient_without_password(async_client: AsyncClient, mock_supabase):
+    mock_bookable_doctor(mock_supabase)
+    users = mock_supabase.table("users")
+    users.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[{"id": 42}])]
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 200
+    guest = users.insert.call_args.args[0]
+    assert guest["mobile"] == "9998887776"
+    assert guest["is_active"] is False
+    # Guests never log in, so they get an unusable hash instead of a real one
+    assert guest["password_hash"].startswith("!")
+    assert mock_supabase.table("appointments").insert.call_args.args[0]["user_id"] == 42
+
+@pytest.mark.asyncio
+async def test_book_guest_reuses_patient_created_concurrently(async_client: AsyncClient, mock_supabase):
+    mock_bookable_doctor(mock_supabase)
+    users = mock_supabase.table("users")
+    # Not found on lookup, then the insert loses the race on users.mobile
+    users.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[{"id": 43}])]
+    users.insert.side_effect = APIError({"code": "23505", "message": "duplicate key value"})
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 200
+    assert mock_supabase.table("appointments").insert.call_args.args[0]["user_id"] == 43
+
+@pytest.mark.asyncio
+async def test_book_guest_rejects_mobile_of_non_patient(async_client: AsyncClient, mock_supabase):
+    mock_bookable_doctor(mock_supabase)
+    users = mock_supabase.table("users")
+    users.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[])]
+    users.insert.side_effect = APIError({"code": "23505", "message": "duplicate key value"})
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Mobile number is registered to a non-patient account"
+    mock_supabase.table("appointments").insert.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_book_taken_slot_is_rejected(async_client: AsyncClient, mock_supabase):
+    mock_bookable_doctor(mock_supabase)
+    mock_supabase.table("users").execute.return_value.data = [{"id": 42}]
+    mock_supabase.table("appointments").insert.side_effect = APIError({"code": "23505", "message": "duplicate key value"})
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Time slot already booked"
+
+@pytest.mark.asyncio
+async def test_book_with_unapproved_hospital_is_rejected(async_client: AsyncClient, mock_supabase):
+    mock_bookable_doctor(mock_supabase)
+    mock_supabase.table("hospitals").execute.return_value.data = [{"id": 10, "status": "pending"}]
+    mock_supabase.table("users").execute.return_value.data = [{"id": 42}]
+    
+    response = await async_client.post("/api/appointments/book-guest", json=GUEST_BOOKING)
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Hospital not found or not approved"
+    mock_supabase.table("appointments").insert.assert_not_called()
+
+def test_mark_visited_returns_the_updated_row(mock_supabase):
+    appointments = mock_supabase.table("appointments")
+    appointments.execute.side_effect = [
+        MagicMock(data=[{"user_id": 1, "doctor_id": 5}]),
+        MagicMock(data=[{"id": 100, "status": "completed", "visit_date": "2030-01-01"}]),
+    ]
+
+    apt = AppointmentService.update_status(100, 5, "doctor", "mark_visited")
+
+    assert apt["visit_date"] == "2030-01-01"
+    update = appointments.update.call_args.args[0]
+    assert update["status"] == "completed"
+    assert update["visit_date"]
+
+def test_status_update_of_deleted_appointment_is_a_404(mock_supabase):
+    # The row is found by the read but gone by the time the update runs
+    mock_supabase.table("appointments").execute.side_effect = [
+        MagicMock(data=[{"user_id": 1, "doctor_id": 5}]),
+        MagicMock(data=[]),
+    ]
+
+    with pytest.raises(HTTPException) as exc:
+        AppointmentService.update_status(100, 5, "doctor", "mark_visited")
+    assert exc.value.status_code == 404
@@ -0,0 +1,97 @@
+import pytest
+from postgrest.exceptions import APIError
+from core.config import settings
+from services import audit_logger
+from services.audit_logger import log_audit_event, stop_audit_writer
+
+@pytest.fixture
+def audit_table(mock_supabase, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_RETRY_BACKOFF_MS", 0)
+    # Start every test from a stopped writer and an empty queue
+    stop_audit_writer()
+    return mock_supabase.table("audit_logs")
+
+def inserted_payloads(table):
+    return [call.args[0] for call in table.insert.call_args_list]
+
+def test_events_are_batched_and_flushed_on_stop(audit_table):
+    for i in range(5):
+        log_audit_event("admin_action", user_id=i, action=f"action {i}")
+    stop_audit_writer()
+
+    payloads = inserted_payloads(audit_table)
+    assert len(payloads) == 1
+    assert [row["user_id"] for row in payloads[0]] == [0, 1, 2, 3, 4]
+    # Timestamps are formatted by the writer, not at enqueue time
+    assert all(isinstance(row["created_at"], str) for row in payloads[0])
+
+def test_batches_are_capped_at_batch_size(audit_table, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_BATCH_SIZE", 2)
+    for i in range(5):
+        log_audit_event("admin_action", user_id=i, action=f"action {i}")
+    stop_audit_writer()
+
+    assert [len(batch) for batch in inserted_payloads(audit_table)] == [2, 2, 1]
+
+def test_transient_batch_failure_is_retried(audit_table):
+    failures = [Exception("connection reset")]
+
+    def insert(rows):
+        if failures:
+            raise failures.pop()
+        return audit_table
+
+    audit_table.insert.side_effect = insert
+    log_audit_event("admin_action", user_id=1, action="retry me")
+    log_audit_event("admin_action", user_id=2, action="retry me too")
+    stop_audit_writer()
+
+    payloads = inserted_payloads(audit_table)
+    # One failed attempt, then the same batch again
+    assert len(payloads) == 2
+    assert payloads[0] is payloads[1]
+    assert [row["user_id"] for row in payloads[1]] == [1, 2]
+
+def test_bad_row_only_loses_that_event(audit_table):
+    fk_violation = APIError({"code": "23503", "message": "violates foreign key constraint"})
+
+    def insert(rows):
+        if isinstance(rows, list) or rows["user_id"] == 999:
+            raise fk_violation
+        return audit_table
+
+    audit_table.insert.side_effect = insert
+    for user_id in (1, 999, 2):
+        log_audit_event("admin_action", user_id=user_id, action="mixed batch")
+    stop_audit_writer()
+
+    payloads = inserted_payloads(audit_table)
+    # Constraint errors are not retried as a batch; every row is then tried on its own
+    assert isinstance(payloads[0], list)
+    assert [row["user_id"] for row in payloads[1:]] == [1, 999, 2]
+
+def test_persistent_batch_failure_falls_back_to_rows(audit_table, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_BATCH_RETRIES", 2)
+
+    def insert(rows):
+        if isinstance(rows, list):
+            raise Exception("service unavailable")
+        return audit_table
+
+    audit_table.insert.side_effect = insert
+    log_audit_event("admin_action", user_id=1, action="a")
+    log_audit_event("admin_action", user_id=2, action="b")
+    stop_audit_writer()
+
+    payloads = inserted_payloads(audit_table)
+    assert sum(isinstance(p, list) for p in payloads) == 3
+    assert [p["user_id"] for p in payloads if isinstance(p, dict)] == [1, 2]
+
+def test_writer_restarts_after_stop(audit_table):
+    log_audit_event("admin_action", user_id=1, action="first")
+    stop_audit_writer()
+    log_audit_event("admin_action", user_id=2, action="second")
+    assert audit_logger._writer_thread is not None
+    stop_audit_writer()
+
+    assert [row["user_id"] for batch in inserted_payloads(audit_table) for row in batch] == [1, 2]
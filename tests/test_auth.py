@@ -1,25 +1,73 @@
+import base64
+import json
+import time
 import pytest
+from datetime import datetime, timedelta, timezone
 from httpx import AsyncClient
-from core.security import create_access_token
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
+from core.config import settings
+import bcrypt
+from core.security import (
+    create_access_token, create_refresh_token, _encode_jwt,
+    get_password_hash, verify_password, password_needs_rehash
+)
+
+def decode(token):
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+def test_access_token_round_trips_through_jose():
+    token = create_access_token({"sub": "1", "role": "patient", "token_version": 3})
+    
+    assert jwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT"}
+    payload = decode(token)
+    assert payload["sub"] == "1"
+    assert payload["role"] == "patient"
+    assert payload["token_version"] == 3
+    expected_exp = time.time() + settings.JWT_EXPIRATION_HOURS * 3600
+    assert abs(payload["exp"] - expected_exp) <= 5
+
+def test_refresh_token_round_trips_through_jose():
+    payload = decode(create_refresh_token({"sub": "1"}))
+    
+    assert payload["type"] == "refresh"
+    assert abs(payload["exp"] - (time.time() + 7 * 24 * 3600)) <= 5
+
+def test_datetime_claims_are_encoded_as_epoch_seconds():
+    exp = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(minutes=5)
+    
+    assert decode(_encode_jwt({"sub": "1", "exp": exp}))["exp"] == int(exp.timestamp())
+
+def test_expired_token_is_rejected():
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-10))
+    
+    with pytest.raises(ExpiredSignatureError):
+        decode(token)
+
+def test_tampered_token_is_rejected():
+    token = create_access_token({"sub": "1", "role": "patient"})
+    header, payload, signature = token.split(".")
+    
+    # Escalate the role without re-signing
+    claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    claims["role"] = "admin"
+    forged = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    with pytest.raises(JWTError):
+        decode(f"{header}.{forged}.{signature}")
+    
+    # Signed with a different key
+    with pytest.raises(JWTError):
+        jwt.decode(token, "another-secret-that-is-32-chars-long", algorithms=["HS256"])
+    
+    # Signature bytes changed
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    with pytest.raises(JWTError):
+        decode(f"{header}.{payload}.{flipped}")
 
 @pytest.mark.asyncio
 async def test_register_user_success(async_client: AsyncClient, mock_supabase):
-    # Setup mock
-    table_mock = mock_supabase.table("users")
-    # Simulate no existing user
-    table_mock.execute.return_value.data = []
-    
-    # Then simulate insert success
-    def side_effect(*args, **kwargs):
-        if args[0] == "users" and hasattr(mock_supabase.table.call_args, 'insert'):
-            m = mock_supabase._mock_children['table'].return_value
-            m.execute.return_value.data = [{"id": 1, "email": "test@test.com", "role": "patient", "is_active": True}]
-            return m
-        return table_mock
-
-    mock_supabase.table.side_effect = None
-    mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
-    mock_supabase.table.return_value.insert.return_value.execute.return_value.data = [
+    # Simulate insert success
+    mock_supabase.table("users").execute.return_value.data = [
         {"id": 1, "email": "test@test.com", "role": "patient", "name": "Test User"}
     ]
 
@@ -36,17 +84,19 @@ async def test_register_user_success(async_client: AsyncClient, mock_supabase):
     
     assert response.status_code == 200
     data = response.json()
-    assert "access_token" in data
+    # Tokens are delivered as HttpOnly cookies
+    assert "access_token" in response.cookies
     assert data["user"]["email"] == "test@test.com"
 
 @pytest.mark.asyncio
 async def test_login_user_success(async_client: AsyncClient, mock_supabase):
     from core.security import get_password_hash
     # Mock user exists
-    mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+    mock_supabase.table("users").execute.return_value.data = [
         {
             "id": 1,
             "email": "test@test.com",
+            "mobile": "1234567890",
             "password_hash": get_password_hash("password123"),
             "is_active": True,
             "role": "patient",
@@ -56,13 +106,13 @@ async def test_login_user_success(async_client: AsyncClient, mock_supabase):
     
     response = await async_client.post(
         "/api/users/login",
-        json={"email": "test@test.com", "password": "password123"}
+        json={"mobile": "1234567890", "password": "password123"}
     )
     
     assert response.status_code == 200
     data = response.json()
-    assert "access_token" in data
-    assert "refresh_token" in data
+    assert "access_token" in response.cookies
+    assert "refresh_token" in response.cookies
     assert data["user"]["id"] == 1
 
 @pytest.mark.asyncio
@@ -70,15 +120,11 @@ async def test_protected_route(async_client: AsyncClient, mock_supabase):
     # Mock JWT and current user
     token = create_access_token({"sub": "1", "role": "patient", "token_version": 1})
     
-    mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+    # Blacklist check finds nothing
+    mock_supabase.table("token_blacklist").execute.return_value.data = []
+    mock_supabase.table("users").execute.return_value.data = [
         {"id": 1, "email": "test@test.com", "is_active": True, "role": "patient", "token_version": 1}
     ]
-    
-    # Also mock blacklist check
-    mock_supabase.table.return_value.select.return_value.eq.return_value.execute.side_effect = [
-        [], # Blacklist check
-        [{"id": 1, "email": "test@test.com", "is_active": True, "role": "patient", "token_version": 1}] # User dict
-    ]
 
     response = await async_client.get(
         "/api/users/me",
@@ -87,3 +133,62 @@ async def test_protected_route(async_client: AsyncClient, mock_supabase):
     
     assert response.status_code == 200
     assert response.json()["id"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_token_is_refused_by_protected_route(async_client: AsyncClient, mock_supabase):
+    token = create_access_token({"sub": "1", "role": "patient", "token_version": 1}, expires_delta=timedelta(seconds=-10))
+    mock_supabase.table("users").execute.return_value.data = [
+        {"id": 1, "is_active": True, "role": "patient", "token_version": 1}
+    ]
+    
+    response = await async_client.get(
+        "/api/users/me",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    
+    assert response.status_code == 401
+
+def test_passwords_are_hashed_with_argon2id():
+    hashed = get_password_hash("password123")
+    
+    assert hashed.startswith("$argon2id$")
+    assert verify_password("password123", hashed)
+    assert not verify_password("password124", hashed)
+    assert not password_needs_rehash(hashed)
+
+def test_legacy_bcrypt_hashes_verify_and_need_rehash():
+    legacy = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=4)).decode()
+    
+    assert verify_password("password123", legacy)
+    assert not verify_password("password124", legacy)
+    assert password_needs_rehash(legacy)
+
+def test_guest_placeholder_hash_never_verifies():
+    assert not verify_password("", "!" + "0" * 32)
+
+@pytest.mark.asyncio
+async def test_login_upgrades_legacy_hash(async_client: AsyncClient, mock_supabase):
+    users = mock_supabase.table("users")
+    users.execute.return_value.data = [
+        {
+            "id": 1,
+            "mobile": "1234567890",
+            "password_hash": bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=4)).decode(),
+            "is_active": True,
+            "role": "patient",
+            "token_version": 1
+        }
+    ]
+    
+    response = await async_client.post(
+        "/api/users/login",
+        json={"mobile": "1234567890", "password": "password123"}
+    )
+    
+    assert response.status_code == 200
+    assert "password_hash" not in response.json()["user"]
+    # Written after the response, together with last_login_at
+    update = users.update.call_args.args[0]
+    assert "last_login_at" in update
+    assert verify_password("password123", update["password_hash"])
+    assert update["password_hash"].startswith("$argon2id$")
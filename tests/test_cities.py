@@ -0,0 +1,108 @@
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from postgrest.exceptions import APIError
+from routers import cities
+
+# main.py does not mount the cities router, so its endpoints are exercised on a bare app
+@pytest_asyncio.fixture
+async def async_client():
+    app = FastAPI()
+    app.include_router(cities.router)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+CITY_ROWS = [
+    {"city_name": "Navi Mumbai", "state_name": "Maharashtra"},
+    {"city_name": "Pune", "state_name": "Maharashtra"},
+    {"city_name": "Mumbai", "state_name": "Maharashtra"},
+    {"city_name": "Delhi", "state_name": "Delhi"},
+]
+
+@pytest.mark.asyncio
+async def test_search_short_query_skips_database(async_client: AsyncClient, mock_supabase):
+    response = await async_client.get("/api/cities/search", params={"q": "m"})
+
+    assert response.status_code == 200
+    assert response.json() == {"cities": [], "source": "empty_query"}
+    mock_supabase.table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_search_ranks_prefix_matches_first_and_caches(async_client: AsyncClient, mock_supabase):
+    mock_supabase.table("cities").execute.return_value.data = CITY_ROWS
+
+    response = await async_client.get("/api/cities/search", params={"q": "MUM"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "database"
+    assert [c["city_name"] for c in data["cities"]] == ["Mumbai", "Navi Mumbai"]
+
+    # Served from the response cache without another query
+    cached = await async_client.get("/api/cities/search", params={"q": "mum"})
+    assert cached.json() == {"cities": data["cities"], "source": "cache", "cached": True}
+    assert mock_supabase.table("cities").execute.call_count == 1
+
+@pytest.mark.asyncio
+async def test_search_large_table_uses_search_cities(async_client: AsyncClient, mock_supabase, mock_rpc):
+    # More active cities than the in-memory index holds
+    mock_supabase.table("cities").execute.return_value.data = [{"city_name": f"City {i}", "state_name": ""} for i in range(901)]
+    mock_rpc["search_cities"] = [{"city_name": "Pune", "state_name": "Maharashtra", "rank": 0}]
+
+    response = await async_client.get("/api/cities/search", params={"q": "pun"})
+
+    assert response.json()["cities"] == [{"city_name": "Pune", "state_name": "Maharashtra"}]
+    mock_supabase.rpc.assert_called_once_with("search_cities", {"p_query": "pun", "p_limit": 20})
+
+@pytest.mark.asyncio
+async def test_popular_cities_answer_conditional_requests(async_client: AsyncClient):
+    response = await async_client.get("/api/cities/popular")
+
+    assert response.status_code == 200
+    assert response.json()["cities"][0] == "Mumbai"
+    etag = response.headers["etag"]
+
+    not_modified = await async_client.get("/api/cities/popular", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+@pytest.mark.asyncio
+async def test_add_city_through_add_city_function(async_client: AsyncClient, mock_supabase, mock_rpc):
+    cities.set_cached_cities("nashik", b"{}")
+    mock_rpc["add_city"] = {"id": 7, "inserted": True}
+
+    response = await async_client.post("/api/cities/add", json={"city_name": " Nashik ", "state_name": "Maharashtra"})
+
+    assert response.json() == {"message": "City added successfully", "city_name": "Nashik", "id": 7}
+    mock_supabase.rpc.assert_called_once_with("add_city", {
+        "p_city_name": "Nashik", "p_state_name": "Maharashtra", "p_district_name": None, "p_pincode": None,
+    })
+    mock_supabase.table("cities").insert.assert_not_called()
+    assert cities.get_cached_cities("nashik") is None
+
+@pytest.mark.asyncio
+async def test_add_existing_city_through_add_city_function(async_client: AsyncClient, mock_rpc):
+    cities.set_cached_cities("pune", b"{}")
+    mock_rpc["add_city"] = {"id": 3, "inserted": False}
+
+    response = await async_client.post("/api/cities/add", json={"city_name": "Pune"})
+
+    assert response.json() == {"message": "City already exists", "city_name": "Pune", "id": 3}
+    assert cities.get_cached_cities("pune") == b"{}"
+
+@pytest.mark.asyncio
+async def test_add_existing_city_without_function(async_client: AsyncClient, mock_supabase):
+    table = mock_supabase.table("cities")
+    table.insert.side_effect = APIError({"code": "23505", "message": "duplicate key value"})
+    table.execute.return_value.data = [{"id": 3}]
+
+    response = await async_client.post("/api/cities/add", json={"city_name": "Pune"})
+
+    assert response.json() == {"message": "City already exists", "city_name": "Pune", "id": 3}
+
+@pytest.mark.asyncio
+async def test_add_city_requires_a_name(async_client: AsyncClient, mock_supabase):
+    response = await async_client.post("/api/cities/add", json={"city_name": "   "})
+
+    assert response.status_code == 400
+    mock_supabase.rpc.assert_not_called()
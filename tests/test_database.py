@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+from core import database
+from core.database import call_rpc
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(database, "_missing_rpcs", set())
+    return MagicMock()
+
+def test_call_rpc_returns_function_result(client):
+    client.rpc.return_value.execute.return_value.data = {"id": 1}
+
+    assert call_rpc(client, "book_operation", {"p_doctor_id": 5}) == {"id": 1}
+    client.rpc.assert_called_once_with("book_operation", {"p_doctor_id": 5})
+
+def test_missing_function_falls_back_once(client):
+    client.rpc.side_effect = APIError({"code": "PGRST202", "message": "Could not find the function"})
+
+    assert call_rpc(client, "book_operation", {}) is None
+    # Remembered as missing, so the fallback costs no further round-trips
+    assert call_rpc(client, "book_operation", {}) is None
+    assert client.rpc.call_count == 1
+
+def test_raised_error_maps_hint_to_status(client):
+    client.rpc.side_effect = APIError({"code": "P0001", "message": "Doctor not found", "hint": "404"})
+
+    with pytest.raises(HTTPException) as exc:
+        call_rpc(client, "book_appointment", {})
+    assert exc.value.status_code == 404
+    assert exc.value.detail == "Doctor not found"
+
+def test_raised_error_without_status_hint_is_a_400(client):
+    client.rpc.side_effect = APIError({"code": "P0001", "message": "Time slot already booked", "hint": None})
+
+    with pytest.raises(HTTPException) as exc:
+        call_rpc(client, "book_appointment", {})
+    assert exc.value.status_code == 400
+
+def test_other_database_errors_propagate(client):
+    error = APIError({"code": "23503", "message": "violates foreign key constraint"})
+    client.rpc.side_effect = error
+
+    with pytest.raises(APIError) as exc:
+        call_rpc(client, "book_appointment", {})
+    assert exc.value is error
+    assert "book_appointment" not in database._missing_rpcs
@@ -0,0 +1,91 @@
+import pytest
+from httpx import AsyncClient
+from postgrest.exceptions import APIError
+from core.security import verify_password
+from services.doctor_service import DoctorService
+
+DOCTOR_SIGNUP = {
+    "name": "Dr. Smith",
+    "mobile": "9000000001",
+    "password": "secret123",
+    "role": "doctor",
+    "degree": "MBBS",
+    "institute_name": "AIIMS",
+    "hospital_id": 10
+}
+
+@pytest.mark.asyncio
+async def test_register_doctor_through_register_doctor(async_client: AsyncClient, mock_supabase, mock_rpc):
+    mock_rpc["register_doctor"] = {"id": 7, "user_id": 3, "hospital_id": 10, "status": "PENDING_APPROVAL", "is_active": False}
+
+    response = await async_client.post("/api/users/register-doctor", json=DOCTOR_SIGNUP)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == 7
+    name, params = mock_supabase.rpc.call_args.args
+    assert name == "register_doctor"
+    assert "password" not in params["p_user"]
+    assert verify_password("secret123", params["p_user"]["password_hash"])
+    assert params["p_doctor"]["hospital_id"] == 10
+    assert params["p_doctor"]["source"] == "registered"
+    # Hospital check and both inserts run in the function's transaction
+    mock_supabase.table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_register_doctor_function_errors_reach_the_client(async_client: AsyncClient, mock_rpc):
+    mock_rpc["register_doctor"] = APIError({"code": "P0001", "message": "Associated hospital is not active", "hint": "400"})
+
+    response = await async_client.post("/api/users/register-doctor", json=DOCTOR_SIGNUP)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Associated hospital is not active"
+
+@pytest.mark.asyncio
+async def test_register_doctor_without_function(async_client: AsyncClient, mock_supabase):
+    mock_supabase.table("hospitals").execute.return_value.data = [{"status": "ACTIVE"}]
+    mock_supabase.table("users").execute.return_value.data = [{"id": 3}]
+    mock_supabase.table("doctors").execute.return_value.data = [{"id": 7, "user_id": 3}]
+
+    response = await async_client.post("/api/users/register-doctor", json=DOCTOR_SIGNUP)
+
+    assert response.status_code == 200
+    doctor = mock_supabase.table("doctors").insert.call_args.args[0]
+    assert doctor["user_id"] == 3
+    assert doctor["status"] == "PENDING_APPROVAL"
+    assert doctor["is_active"] is False
+
+@pytest.mark.asyncio
+async def test_register_doctor_rejects_inactive_hospital(async_client: AsyncClient, mock_supabase):
+    mock_supabase.table("hospitals").execute.return_value.data = [{"status": "PENDING"}]
+
+    response = await async_client.post("/api/users/register-doctor", json=DOCTOR_SIGNUP)
+
+    assert response.status_code == 400
+    mock_supabase.table("users").insert.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_register_doctor_removes_user_when_profile_insert_fails(async_client: AsyncClient, mock_supabase):
+    mock_supabase.table("hospitals").execute.return_value.data = [{"status": "ACTIVE"}]
+    mock_supabase.table("users").execute.return_value.data = [{"id": 3}]
+    mock_supabase.table("doctors").execute.return_value.data = []
+
+    response = await async_client.post("/api/users/register-doctor", json=DOCTOR_SIGNUP)
+
+    assert response.status_code == 500
+    users = mock_supabase.table("users")
+    users.delete.assert_called_once()
+    users.eq.assert_any_call("id", 3)
+
+def test_active_doctor_lookups_are_cached(mock_supabase):
+    doctors = mock_supabase.table("doctors")
+    doctors.execute.return_value.data = [{"id": 5, "name": "Dr. Smith", "hospital_id": 10}]
+    
+    assert DoctorService.get_cached_doctor(5)["hospital_id"] == 10
+    assert DoctorService.get_cached_doctor(5)["hospital_id"] == 10
+    assert doctors.execute.call_count == 1
+    
+    # Misses are not cached, so a doctor activated later is found
+    doctors.execute.return_value.data = []
+    assert DoctorService.get_cached_doctor(6) is None
+    doctors.execute.return_value.data = [{"id": 6, "name": "Dr. Rao", "hospital_id": 10}]
+    assert DoctorService.get_cached_doctor(6)["name"] == "Dr. Rao"
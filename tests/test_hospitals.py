@@ -1,5 +1,6 @@
 import pytest
 from httpx import AsyncClient
+from services.hospital_service import HospitalService
 
 @pytest.mark.asyncio
 async def test_register_hospital_missing_payment(async_client: AsyncClient):
@@ -16,7 +17,7 @@ async def test_register_hospital_missing_payment(async_client: AsyncClient):
 
 @pytest.mark.asyncio
 async def test_get_hospitals_public(async_client: AsyncClient, mock_supabase):
-    mock_supabase.table.return_value.select.return_value.order.return_value.execute.return_value.data = [
+    mock_supabase.table("hospitals").execute.return_value.data = [
         {"id": 1, "name": "City Care", "status": "approved"}
     ]
     
@@ -24,3 +25,17 @@ async def test_get_hospitals_public(async_client: AsyncClient, mock_supabase):
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["name"] == "City Care"
+
+def test_hospital_cache_follows_status_updates(mock_supabase):
+    hospitals = mock_supabase.table("hospitals")
+    hospitals.execute.return_value.data = [{"id": 10, "status": "pending"}]
+    
+    assert HospitalService.get_cached_hospital(10)["status"] == "pending"
+    assert HospitalService.get_cached_hospital(10)["status"] == "pending"
+    assert hospitals.execute.call_count == 1
+    
+    # The updated row replaces the cached one, so the next booking check needs no fetch
+    hospitals.execute.return_value.data = [{"id": 10, "status": "approved"}]
+    HospitalService.update_status(10, "approved")
+    assert HospitalService.get_cached_hospital(10)["status"] == "approved"
+    assert hospitals.execute.call_count == 2
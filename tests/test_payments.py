@@ -0,0 +1,26 @@
+import pytest
+from httpx import AsyncClient
+from core.security import create_access_token
+
+@pytest.mark.asyncio
+async def test_my_payments_pages_by_id(async_client: AsyncClient, mock_supabase):
+    token = create_access_token({"sub": "1", "role": "patient", "token_version": 1})
+    mock_supabase.table("users").execute.return_value.data = [{"id": 1, "is_active": True, "token_version": 1}]
+    payments = mock_supabase.table("payments")
+    payments.execute.return_value.data = [{"id": 9}, {"id": 8}]
+
+    response = await async_client.get(
+        "/api/payments/my-payments", params={"limit": 2}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"payments": [{"id": 9}, {"id": 8}], "next_cursor": 8}
+
+    # A short page is the last one
+    payments.execute.return_value.data = [{"id": 7}]
+    response = await async_client.get(
+        "/api/payments/my-payments", params={"limit": 2, "before_id": 8}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.json() == {"payments": [{"id": 7}], "next_cursor": None}
+    payments.lt.assert_called_with("id", 8)